@@ -0,0 +1,55 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from dijkstra import bidirectional_dijkstra, shortest_path
+from contraction_hierarchy import ContractionHierarchy
+from benchmarks.generators import GENERATORS, build_graph
+
+
+def mean_query_time(query, pairs):
+    start = time.perf_counter()
+    results = [query(s, t) for s, t in pairs]
+    return (time.perf_counter() - start) / len(pairs), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare contraction-hierarchy queries against plain Dijkstra.")
+    parser.add_argument('--generator', choices=list(GENERATORS), default='road')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 4_000, 10_000])
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'preprocess':>11} {'index':>10} {'dijkstra':>10} {'bidir':>10} {'ch':>10} {'speedup':>8}")
+    for num_nodes in args.sizes:
+        graph = build_graph(GENERATORS[args.generator](num_nodes, seed=args.seed))
+        rng = random.Random(args.seed)
+        nodes = graph.get_nodes()
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(graph)
+        preprocess_time = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.npz')
+            hierarchy.save(path)
+            index_size = os.path.getsize(path)
+            hierarchy = ContractionHierarchy.load(path)
+
+        dijkstra_time, expected = mean_query_time(lambda s, t: shortest_path(graph, s, t), pairs)
+        bidir_time, _ = mean_query_time(lambda s, t: bidirectional_dijkstra(graph, s, t), pairs)
+        ch_time, results = mean_query_time(hierarchy.shortest_path, pairs)
+        for (_, want), (_, got) in zip(expected, results):
+            assert abs(want - got) < 1e-6, (want, got)
+
+        print(f"{len(nodes):>8} {preprocess_time:10.2f}s {index_size / 2**20:8.2f}MB "
+              f"{dijkstra_time * 1e3:8.2f}ms {bidir_time * 1e3:8.2f}ms {ch_time * 1e3:8.3f}ms "
+              f"{dijkstra_time / ch_time:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import random
+import time
+
+from graph import Graph
+from dijkstra import dijkstra
+
+
+# The original O(V^2) loop, kept here as the baseline to compare against
+def dijkstra_list_scan(graph, start_node):
+    distances = {node: float('infinity') for node in graph.get_nodes()}
+    distances[start_node] = 0
+    previous_nodes = {node: None for node in graph.get_nodes()}
+    unvisited = list(graph.get_nodes())
+
+    while unvisited:
+        current_node = min(unvisited, key=lambda node: distances[node])
+        unvisited.remove(current_node)
+
+        if distances[current_node] == float('infinity'):
+            break
+
+        for neighbor in graph.get_neighbors(current_node):
+            weight = graph.get_edge_weight(current_node, neighbor)
+            tentative_distance = distances[current_node] + weight
+
+            if tentative_distance < distances[neighbor]:
+                distances[neighbor] = tentative_distance
+                previous_nodes[neighbor] = current_node
+
+    return distances, previous_nodes
+
+
+def random_graph(num_edges, avg_degree=8, seed=0):
+    rng = random.Random(seed)
+    num_nodes = max(2, 2 * num_edges // avg_degree)
+    graph = Graph()
+    # A spanning path keeps the graph connected
+    for node in range(1, num_nodes):
+        graph.add_edge(node - 1, node, rng.randint(1, 100))
+    added = num_nodes - 1
+    while added < num_edges:
+        u, v = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        if u != v and not graph.has_edge(u, v):
+            graph.add_edge(u, v, rng.randint(1, 100))
+            added += 1
+    return graph
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the heap-based dijkstra() against the list-scan loop.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--baseline-limit', type=int, default=100_000,
+                        help="skip the O(V^2) baseline above this many edges")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'edges':>10} {'nodes':>9} {'list scan':>11} {'heap':>9} {'heap+target':>12} {'speedup':>8}")
+    for num_edges in args.sizes:
+        graph = random_graph(num_edges, seed=args.seed)
+        nodes = graph.get_nodes()
+        rng = random.Random(args.seed)
+        source, target = rng.choice(nodes), rng.choice(nodes)
+
+        heap_time = timed(dijkstra, graph, source)
+        target_time = timed(dijkstra, graph, source, target=target)
+        if num_edges <= args.baseline_limit:
+            scan_time = timed(dijkstra_list_scan, graph, source)
+            scan_col, speedup_col = f"{scan_time:10.3f}s", f"{scan_time / heap_time:7.1f}x"
+        else:
+            scan_col, speedup_col = f"{'skipped':>11}", f"{'-':>8}"
+        print(f"{num_edges:>10} {len(nodes):>9} {scan_col} {heap_time:8.3f}s {target_time:11.3f}s {speedup_col}")
+
+
+if __name__ == '__main__':
+    main()
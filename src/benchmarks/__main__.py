@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from benchmarks.generators import GENERATORS
+from benchmarks.suite import DEFAULT_SIZES, compare_results, load_results, run_suite, save_results
+
+
+def _report(regressions):
+    for row in regressions:
+        print(f"REGRESSION {row['generator']} n={row['nodes']} {row['phase']} {row['metric']}: "
+              f"{row['baseline']:.4g} -> {row[row['metric']]:.4g} ({row['ratio']:.2f}x)")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Graph and search benchmarks.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the suite and write JSON results")
+    run.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    run.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="node counts, e.g. 100 ... 1000000")
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--queries', type=int, default=20)
+    run.add_argument('--render-limit', type=int, default=500, help="skip rendering above this many nodes")
+    run.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak-memory pass")
+    run.add_argument('--output', '-o', default='benchmark_results.json')
+    run.add_argument('--baseline', help="compare against this results file and fail on regressions")
+    run.add_argument('--threshold', type=float, default=0.2)
+
+    compare = commands.add_parser('compare', help="compare two results files")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return _report(compare_results(load_results(args.baseline), load_results(args.current), args.threshold))
+
+    results = run_suite(args.generators, args.sizes, seed=args.seed, repeat=args.repeat, queries=args.queries,
+                        memory=not args.no_memory, render_limit=args.render_limit, log=print)
+    save_results(results, args.output)
+    print(f"Wrote {args.output}")
+    if args.baseline:
+        return _report(compare_results(load_results(args.baseline), results, args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
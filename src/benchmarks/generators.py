@@ -0,0 +1,135 @@
+import math
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from graph import Graph
+from compact_graph import CompactGraph
+
+# Parallel arrays describing an undirected weighted graph on ids 0..num_nodes-1
+EdgeList = namedtuple('EdgeList', ['num_nodes', 'sources', 'targets', 'weights', 'coords'])
+
+
+def grid(num_nodes, seed=0):
+    """Square 2D grid with uniform(1, 10) weights."""
+    rng = np.random.default_rng(seed)
+    side = max(2, math.isqrt(num_nodes - 1) + 1)
+    ids = np.arange(side * side).reshape(side, side)
+    sources = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    targets = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    x, y = np.divmod(np.arange(side * side), side)
+    coords = np.column_stack([x, y]) / side
+    return EdgeList(side * side, sources, targets, rng.uniform(1, 10, len(sources)), coords)
+
+
+def random_geometric(num_nodes, avg_degree=6, seed=0):
+    """Points in the unit square joined when closer than the radius giving ``avg_degree``.
+
+    Weights are the Euclidean edge lengths.
+    """
+    rng = np.random.default_rng(seed)
+    coords = rng.random((num_nodes, 2))
+    radius = math.sqrt(avg_degree / (math.pi * num_nodes))
+    cells_per_side = max(1, int(1 / radius))
+    cell = np.minimum((coords * cells_per_side).astype(np.int64), cells_per_side - 1)
+    cell_id = cell[:, 0] * cells_per_side + cell[:, 1]
+    order = np.argsort(cell_id, kind='stable')
+    bounds = np.searchsorted(cell_id[order], np.arange(cells_per_side * cells_per_side + 1))
+    cx, cy = cell[order, 0], cell[order, 1]
+
+    sources, targets = [], []
+    # Compare each cell with itself and four of its neighbours so every pair is seen once
+    for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+        nx, ny = cx + dx, cy + dy
+        valid = (nx >= 0) & (nx < cells_per_side) & (ny >= 0) & (ny < cells_per_side)
+        neighbor_cell = np.where(valid, nx * cells_per_side + ny, 0)
+        first = bounds[neighbor_cell]
+        counts = np.where(valid, bounds[neighbor_cell + 1] - first, 0)
+        # Expand every point against every point of its neighbouring cell
+        i = np.repeat(order, counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(first, counts) + within]
+        close = np.hypot(*(coords[i] - coords[j]).T) < radius
+        if dx == 0 and dy == 0:
+            close &= i < j
+        sources.append(i[close])
+        targets.append(j[close])
+
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    weights = np.hypot(*(coords[sources] - coords[targets]).T)
+    return EdgeList(num_nodes, sources, targets, weights, coords)
+
+
+def barabasi_albert(num_nodes, edges_per_node=3, seed=0):
+    """Scale-free graph by preferential attachment, with uniform(1, 10) weights."""
+    rng = random.Random(seed)
+    m = min(edges_per_node, max(1, num_nodes - 1))
+    sources, targets = [], []
+    # Every endpoint is listed once per incident edge, so sampling is degree-proportional
+    endpoints = list(range(m))
+    for node in range(m, num_nodes):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(endpoints))
+        for other in chosen:
+            sources.append(node)
+            targets.append(other)
+        endpoints.extend(chosen)
+        endpoints.extend([node] * m)
+
+    np_rng = np.random.default_rng(seed)
+    return EdgeList(num_nodes, np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+                    np_rng.uniform(1, 10, len(sources)), np_rng.random((num_nodes, 2)))
+
+
+def road_like(num_nodes, drop=0.2, diagonal=0.3, seed=0):
+    """Planar road-like network: a jittered grid with missing streets and some diagonals.
+
+    At most one diagonal is added per grid cell, so the graph stays planar.
+    Weights are edge lengths times a uniform(1, 1.5) slowdown, so straight-line
+    distance stays an admissible A* heuristic.
+    """
+    rng = np.random.default_rng(seed)
+    base = grid(num_nodes, seed)
+    side = math.isqrt(base.num_nodes)
+    coords = base.coords + rng.uniform(-0.3, 0.3, base.coords.shape) / side
+
+    keep = rng.random(len(base.sources)) >= drop
+    ids = np.arange(side * side).reshape(side, side)
+    cells = rng.random((side - 1, side - 1)) < diagonal
+    flip = rng.random((side - 1, side - 1)) < 0.5
+    diag_sources = np.where(flip, ids[:-1, 1:], ids[:-1, :-1])[cells]
+    diag_targets = np.where(flip, ids[1:, :-1], ids[1:, 1:])[cells]
+
+    sources = np.concatenate([base.sources[keep], diag_sources])
+    targets = np.concatenate([base.targets[keep], diag_targets])
+    lengths = np.hypot(*(coords[sources] - coords[targets]).T)
+    weights = lengths * rng.uniform(1, 1.5, len(lengths))
+    return EdgeList(base.num_nodes, sources, targets, weights, coords)
+
+
+GENERATORS = {
+    'grid': grid,
+    'geometric': random_geometric,
+    'scale_free': barabasi_albert,
+    'road': road_like,
+}
+
+# Generators whose weights are never shorter than the straight-line distance
+GEOMETRIC = {'grid', 'geometric', 'road'}
+
+
+def build_graph(edge_list):
+    graph = Graph()
+    for node, pos in enumerate(edge_list.coords.tolist()):
+        graph.add_node(node)
+        graph.set_position(node, tuple(pos))
+    for u, v, weight in zip(edge_list.sources.tolist(), edge_list.targets.tolist(), edge_list.weights.tolist()):
+        graph.add_edge(u, v, weight)
+    return graph
+
+
+def build_compact(edge_list):
+    return CompactGraph.from_edge_arrays(edge_list.num_nodes, edge_list.sources, edge_list.targets,
+                                         edge_list.weights, coords=edge_list.coords)
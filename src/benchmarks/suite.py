@@ -0,0 +1,158 @@
+import io
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from dijkstra import dijkstra, reconstruct_path, shortest_path
+from visualization import draw_graph, draw_graph_lod
+from benchmarks.generators import GENERATORS, GEOMETRIC, build_compact, build_graph
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+RESULTS_VERSION = 1
+
+
+def _measure(fn, repeat, memory):
+    # Best-of-``repeat`` wall time; peak memory comes from one extra traced run
+    # so tracemalloc's overhead doesn't leak into the timings.
+    best = float('infinity')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, value
+
+
+def _render(graph, draw=draw_graph):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    draw(graph, ax, pos=graph.get_positions())
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getbuffer().nbytes
+
+
+def run_case(generator, num_nodes, seed=0, repeat=3, queries=20, memory=True, render_limit=500):
+    """Time every phase for one generated graph; returns a list of result rows."""
+    edge_list = GENERATORS[generator](num_nodes, seed=seed)
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(edge_list.num_nodes), rng.randrange(edge_list.num_nodes)) for _ in range(queries)]
+    source = pairs[0][0]
+
+    phases = []
+    graph_holder = {}
+
+    def build():
+        graph_holder['graph'] = build_graph(edge_list)
+        return graph_holder['graph']
+
+    phases.append(('build_graph', build))
+    phases.append(('build_compact', lambda: build_compact(edge_list)))
+    phases.append(('freeze', lambda: graph_holder['graph'].freeze()))
+    phases.append(('single_source', lambda: dijkstra(graph_holder['graph'], source)))
+    phases.append(('single_source_compact', lambda: dijkstra(graph_holder['compact'], source)))
+
+    def reconstruct():
+        _, previous_nodes = graph_holder['tree']
+        return [reconstruct_path(previous_nodes, source, target) for _, target in pairs]
+
+    phases.append(('reconstruct_path', reconstruct))
+    methods = ['dijkstra', 'bidirectional'] + (['astar'] if generator in GEOMETRIC else [])
+    for method in methods:
+        phases.append((f'p2p_{method}',
+                       lambda method=method: [shortest_path(graph_holder['graph'], s, t, method=method) for s, t in pairs]))
+    if edge_list.num_nodes <= render_limit:
+        phases.append(('render', lambda: _render(graph_holder['graph'])))
+    phases.append(('render_lod', lambda: _render(graph_holder['compact'], draw_graph_lod)))
+
+    rows = []
+    for phase, fn in phases:
+        if phase in ('single_source_compact', 'render_lod') and 'compact' not in graph_holder:
+            graph_holder['compact'] = graph_holder['graph'].freeze()
+        if phase == 'reconstruct_path' and 'tree' not in graph_holder:
+            graph_holder['tree'] = dijkstra(graph_holder['graph'], source)
+        seconds, peak, _ = _measure(fn, repeat, memory)
+        if phase.startswith('p2p_') or phase == 'reconstruct_path':
+            seconds /= len(pairs)
+        rows.append({
+            'generator': generator,
+            'nodes': edge_list.num_nodes,
+            'edges': len(edge_list.sources),
+            'phase': phase,
+            'seconds': seconds,
+            'peak_bytes': peak,
+        })
+    return rows
+
+
+def run_suite(generators=None, sizes=None, seed=0, repeat=3, queries=20, memory=True, render_limit=500, log=None):
+    results = []
+    for generator in generators or list(GENERATORS):
+        for num_nodes in sizes or DEFAULT_SIZES:
+            rows = run_case(generator, num_nodes, seed=seed, repeat=repeat, queries=queries,
+                            memory=memory, render_limit=render_limit)
+            if log is not None:
+                for row in rows:
+                    log(format_row(row))
+            results.extend(rows)
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'queries': queries,
+        },
+        'results': results,
+    }
+
+
+def format_row(row):
+    peak = '-' if row['peak_bytes'] is None else f"{row['peak_bytes'] / 2**20:8.1f}MB"
+    return f"{row['generator']:>10} {row['nodes']:>8} {row['phase']:>22} {row['seconds'] * 1e3:12.3f}ms {peak:>10}"
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=0.2, min_seconds=1e-4):
+    """Rows of ``current`` that got more than ``threshold`` slower or bigger than ``baseline``.
+
+    Timings under ``min_seconds`` in both runs are ignored as noise.
+    """
+    key = lambda row: (row['generator'], row['nodes'], row['phase'])
+    previous = {key(row): row for row in baseline['results']}
+    regressions = []
+    for row in current['results']:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        if max(old['seconds'], row['seconds']) >= min_seconds and row['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append({**row, 'metric': 'seconds', 'baseline': old['seconds'], 'ratio': row['seconds'] / old['seconds']})
+        if old['peak_bytes'] and row['peak_bytes'] and row['peak_bytes'] > old['peak_bytes'] * (1 + threshold):
+            regressions.append({**row, 'metric': 'peak_bytes', 'baseline': old['peak_bytes'],
+                                'ratio': row['peak_bytes'] / old['peak_bytes']})
+    return regressions
@@ -0,0 +1,199 @@
+import operator
+
+import numpy as np
+
+
+class _RangeIndex:
+    # Label -> id lookup for graphs whose labels are a contiguous int range,
+    # so large loaded graphs don't need a dict with one entry per node.
+    def __init__(self, nodes):
+        self.start = nodes.start
+        self.stop = nodes.stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __contains__(self, node):
+        try:
+            node = operator.index(node)
+        except TypeError:
+            return False
+        return self.start <= node < self.stop
+
+    def __getitem__(self, node):
+        if node not in self:
+            raise KeyError(node)
+        return operator.index(node) - self.start
+
+    def get(self, node, default=None):
+        return self[node] if node in self else default
+
+
+class CompactGraph:
+    """Read-only CSR snapshot of a Graph.
+
+    Node labels are interned to integer ids 0..n-1. The neighbours of node id
+    ``i`` are ``indices[indptr[i]:indptr[i + 1]]`` (sorted by id) with matching
+    edge weights in ``weights``. Build one with ``Graph.freeze()`` or, from
+    raw edge arrays, with ``CompactGraph.from_edge_arrays``.
+    """
+
+    def __init__(self, nodes, indptr, indices, weights, coords=None):
+        if isinstance(nodes, range):
+            self.nodes = nodes
+            self.node_index = _RangeIndex(nodes)
+        else:
+            self.nodes = list(nodes)
+            self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        if coords is None:
+            coords = np.zeros((len(self.nodes), 2))
+        self.coords = coords
+
+    @classmethod
+    def from_graph(cls, graph, dtype=np.float64):
+        nodes = list(graph.edges)
+        node_index = {node: i for i, node in enumerate(nodes)}
+        n = len(nodes)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        for i, node in enumerate(nodes):
+            indptr[i + 1] = len(graph.edges[node])
+        np.cumsum(indptr, out=indptr)
+
+        m = int(indptr[-1])
+        indices = np.empty(m, dtype=np.int32 if n < 2**31 else np.int64)
+        weights = np.empty(m, dtype=dtype)
+        for i, node in enumerate(nodes):
+            start, end = indptr[i], indptr[i + 1]
+            neighbors = graph.edges[node]
+            indices[start:end] = [node_index[neighbor] for neighbor in neighbors]
+            weights[start:end] = list(neighbors.values())
+            order = np.argsort(indices[start:end], kind='stable')
+            indices[start:end] = indices[start:end][order]
+            weights[start:end] = weights[start:end][order]
+
+        coords = np.array([graph.positions.get(node, (0.0, 0.0)) for node in nodes], dtype=np.float64).reshape(n, 2)
+        return cls(nodes, indptr, indices, weights, coords)
+
+    @classmethod
+    def from_edge_arrays(cls, num_nodes, sources, targets, weights, nodes=None, coords=None, dtype=np.float64):
+        """Build a graph in bulk from parallel arrays of node ids.
+
+        Each (source, target, weight) row is an undirected edge; self-loops
+        are dropped and parallel edges keep the smallest weight. ``nodes``
+        labels the ids and defaults to ``range(num_nodes)``. Missing
+        coordinates are drawn uniformly from the unit square, as
+        ``Graph.add_node`` does.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=dtype)
+        keep = sources != targets
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+        rows = np.concatenate([sources, targets])
+        cols = np.concatenate([targets, sources])
+        weights = np.concatenate([weights, weights])
+        order = np.lexsort((weights, cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, weights = rows[first], cols[first], weights[first]
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+        indices = cols.astype(np.int32 if num_nodes < 2**31 else np.int64)
+        if nodes is None:
+            nodes = range(num_nodes)
+        if coords is None:
+            coords = np.random.random((num_nodes, 2))
+        return cls(nodes, indptr, indices, weights, coords)
+
+    def thaw(self, label=None):
+        """Copy back into a mutable Graph, optionally mapping labels through ``label``."""
+        from graph import Graph
+        graph = Graph()
+        nodes = self.nodes if label is None else [label(node) for node in self.nodes]
+        indptr, indices, weights = self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+        for i, node in enumerate(nodes):
+            start, end = indptr[i], indptr[i + 1]
+            graph.edges[node] = {nodes[j]: weight for j, weight in zip(indices[start:end], weights[start:end])}
+        graph.positions = dict(zip(nodes, map(tuple, self.coords.tolist())))
+        return graph
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.indices) // 2
+
+    # Integer-id API: these return views into the CSR arrays, no copies
+    def neighbor_ids(self, node_id):
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def neighbor_weights(self, node_id):
+        return self.weights[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def lookup(self, text):
+        """Node id for a label given as text, e.g. from a URL or the command line.
+
+        Falls back to the integer label for DIMACS/Matrix Market graphs;
+        raises KeyError if neither matches.
+        """
+        if text in self.node_index:
+            return self.node_index[text]
+        try:
+            return self.node_index[int(text)]
+        except (ValueError, KeyError):
+            raise KeyError(text) from None
+
+    def _edge_slot(self, node1, node2):
+        i, j = self.node_index[node1], self.node_index.get(node2)
+        if j is None:
+            return None
+        start, end = self.indptr[i], self.indptr[i + 1]
+        slot = start + np.searchsorted(self.indices[start:end], j)
+        if slot < end and self.indices[slot] == j:
+            return slot
+        return None
+
+    # Same query API as Graph
+    def get_nodes(self):
+        return self.nodes
+
+    def get_neighbors(self, node):
+        return [self.nodes[j] for j in self.neighbor_ids(self.node_index[node]).tolist()]
+
+    def get_weighted_neighbors(self, node):
+        i = self.node_index[node]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        nodes = self.nodes
+        return [(nodes[j], weight) for j, weight in zip(self.indices[start:end].tolist(), self.weights[start:end].tolist())]
+
+    def get_edge_weight(self, node1, node2):
+        slot = self._edge_slot(node1, node2)
+        if slot is None:
+            raise KeyError(node2)
+        return self.weights[slot].item()
+
+    def get_edges(self):
+        # Each undirected edge is listed once, with the smaller id first
+        nodes = self.nodes
+        for i in range(len(nodes)):
+            start, end = self.indptr[i], self.indptr[i + 1]
+            for j, weight in zip(self.indices[start:end].tolist(), self.weights[start:end].tolist()):
+                if i < j:
+                    yield nodes[i], nodes[j], weight
+
+    def has_edge(self, node1, node2):
+        return node1 in self.node_index and self._edge_slot(node1, node2) is not None
+
+    def get_positions(self):
+        return dict(zip(self.nodes, map(tuple, self.coords.tolist())))
+
+    def set_position(self, node, pos):
+        self.coords[self.node_index[node]] = pos
@@ -0,0 +1,223 @@
+import heapq
+
+import numpy as np
+
+import instrumentation
+
+
+class ContractionHierarchy:
+    """Contraction-hierarchy index for fast point-to-point queries.
+
+    Build one with ``ContractionHierarchy.build(graph)``. Nodes are
+    contracted in edge-difference order; every contraction adds the shortcut
+    edges needed to keep distances between the remaining nodes intact. The
+    index keeps, for each node, only its edges to higher-ranked nodes (the
+    upward graph, stored as CSR arrays) plus the middle node of every
+    shortcut so paths can be unpacked. Assumes an undirected graph, as
+    ``Graph`` builds, so the same upward graph serves both search directions.
+    """
+
+    def __init__(self, nodes, rank, indptr, indices, weights, shortcuts):
+        self.nodes = list(nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.rank = rank
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        # shortcuts is a (k, 3) array of (u, w, middle) rows with u < w
+        self.shortcuts = shortcuts
+        self.middle = {(u, w): m for u, w, m in shortcuts.tolist()}
+
+    @classmethod
+    def build(cls, graph, witness_limit=64):
+        """Contract every node of ``graph``.
+
+        ``witness_limit`` caps how many nodes each witness search may settle;
+        lower values preprocess faster but may add redundant shortcuts.
+        """
+        nodes = list(graph.get_nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        n = len(nodes)
+
+        adjacency = [{} for _ in range(n)]
+        for i, node in enumerate(nodes):
+            for neighbor, weight in graph.get_weighted_neighbors(node):
+                j = node_index[neighbor]
+                if i != j and weight < adjacency[i].get(j, float('infinity')):
+                    adjacency[i][j] = weight
+
+        def witness_distances(source, skip, limit):
+            # Bounded local Dijkstra that avoids the node being contracted
+            dist = {source: 0}
+            heap = [(0, source)]
+            settled = 0
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > limit or settled >= witness_limit:
+                    break
+                settled += 1
+                for v, weight in adjacency[u].items():
+                    if v == skip:
+                        continue
+                    tentative_distance = d + weight
+                    if tentative_distance < dist.get(v, float('infinity')):
+                        dist[v] = tentative_distance
+                        heapq.heappush(heap, (tentative_distance, v))
+            return dist
+
+        def needed_shortcuts(v):
+            neighbors = list(adjacency[v].items())
+            shortcuts = []
+            for k, (u, weight_u) in enumerate(neighbors):
+                via_v = {w: weight_u + weight_w for w, weight_w in neighbors[k + 1:]}
+                if not via_v:
+                    continue
+                witness = witness_distances(u, v, max(via_v.values()))
+                for w, d in via_v.items():
+                    if witness.get(w, float('infinity')) > d:
+                        shortcuts.append((u, w, d))
+            return shortcuts
+
+        contracted_neighbors = [0] * n
+
+        def priority(v, shortcuts):
+            return len(shortcuts) - len(adjacency[v]) + contracted_neighbors[v]
+
+        heap = []
+        for v in range(n):
+            heapq.heappush(heap, (priority(v, needed_shortcuts(v)), v))
+
+        rank = np.empty(n, dtype=np.int64)
+        upward = [None] * n
+        middle = {}
+        next_rank = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Lazy update: re-evaluate and put back if no longer the cheapest
+            shortcuts = needed_shortcuts(v)
+            current = priority(v, shortcuts)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            rank[v] = next_rank
+            next_rank += 1
+            upward[v] = adjacency[v]
+            for u in adjacency[v]:
+                del adjacency[u][v]
+                contracted_neighbors[u] += 1
+            for u, w, d in shortcuts:
+                if d < adjacency[u].get(w, float('infinity')):
+                    adjacency[u][w] = adjacency[w][u] = d
+                    middle[(min(u, w), max(u, w))] = v
+            adjacency[v] = {}
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(edges) for edges in upward])
+        indices = np.fromiter((u for edges in upward for u in edges), dtype=np.int64, count=int(indptr[-1]))
+        weights = np.fromiter((w for edges in upward for w in edges.values()), dtype=np.float64, count=int(indptr[-1]))
+        shortcuts = np.array([(u, w, m) for (u, w), m in middle.items()], dtype=np.int64).reshape(-1, 3)
+        return cls(nodes, rank, indptr, indices, weights, shortcuts)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.rank, self.indptr, self.indices, self.weights, self.shortcuts))
+
+    def save(self, path):
+        if all(isinstance(node, str) for node in self.nodes):
+            nodes = np.array(self.nodes, dtype=str)
+        elif all(isinstance(node, int) for node in self.nodes):
+            nodes = np.array(self.nodes, dtype=np.int64)
+        else:
+            nodes = np.array(self.nodes, dtype=object)
+        np.savez(path, nodes=nodes, rank=self.rank, indptr=self.indptr, indices=self.indices,
+                 weights=self.weights, shortcuts=self.shortcuts)
+
+    @classmethod
+    def load(cls, path, allow_pickle=False):
+        # allow_pickle is only needed for node labels that aren't all str or int;
+        # only enable it for files you trust.
+        with np.load(path, allow_pickle=allow_pickle) as data:
+            return cls(data['nodes'].tolist(), data['rank'], data['indptr'], data['indices'],
+                       data['weights'], data['shortcuts'])
+
+    @instrumentation.timed('search')
+    def shortest_path(self, start_node, end_node, stats=None):
+        """Return ``(path, distance)`` like ``dijkstra.shortest_path``."""
+        source, target = self.node_index[start_node], self.node_index[end_node]
+        if source == target:
+            instrumentation.report(stats, settled=1, relaxations=0, pushes=0, pops=0)
+            return [start_node], 0
+
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        dist = ({source: 0}, {target: 0})
+        prev = ({source: -1}, {target: -1})
+        heaps = ([(0, source)], [(0, target)])
+        best, meeting_node = float('infinity'), -1
+        settled = 0
+        pushes, dropped = 2, 0
+
+        # Both searches only climb to higher ranks; the top node of the
+        # shortest path is reached from both sides.
+        while heaps[0] or heaps[1]:
+            if not heaps[1] or (heaps[0] and heaps[0][0][0] <= heaps[1][0][0]):
+                side = 0
+            else:
+                side = 1
+            d, u = heapq.heappop(heaps[side])
+            if d > dist[side][u]:
+                continue
+            if d >= best:
+                dropped += len(heaps[side])
+                heaps[side].clear()
+                continue
+            settled += 1
+
+            other_distance = dist[1 - side].get(u)
+            if other_distance is not None and d + other_distance < best:
+                best, meeting_node = d + other_distance, u
+
+            start, end = indptr[u], indptr[u + 1]
+            for v, weight in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                tentative_distance = d + weight
+                if tentative_distance < dist[side].get(v, float('infinity')):
+                    dist[side][v] = tentative_distance
+                    prev[side][v] = u
+                    heapq.heappush(heaps[side], (tentative_distance, v))
+                    pushes += 1
+
+        instrumentation.report(stats, settled=settled, relaxations=pushes - 2, pushes=pushes, pops=pushes - dropped)
+        if meeting_node < 0:
+            return None, float('infinity')
+
+        up_path = []
+        current = meeting_node
+        while current >= 0:
+            up_path.append(current)
+            current = prev[0][current]
+        up_path.reverse()
+        current = prev[1][meeting_node]
+        while current >= 0:
+            up_path.append(current)
+            current = prev[1][current]
+
+        nodes = self.nodes
+        return [nodes[i] for i in self._unpack(up_path)], best
+
+    @instrumentation.timed('reconstruct')
+    def _unpack(self, path):
+        middle = self.middle
+        unpacked = [path[0]]
+        for a, b in zip(path, path[1:]):
+            stack = [(a, b)]
+            while stack:
+                u, w = stack.pop()
+                m = middle.get((min(u, w), max(u, w)))
+                if m is None:
+                    unpacked.append(w)
+                else:
+                    stack.append((m, w))
+                    stack.append((u, m))
+        return unpacked
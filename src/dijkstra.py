@@ -1,22 +1,273 @@
-def dijkstra(graph, start_node):
+import heapq
+import math
+from itertools import count
+
+import instrumentation
+
+
+@instrumentation.timed('search')
+def dijkstra(graph, start_node, target=None, stats=None):
+    if hasattr(graph, 'indptr'):
+        return _dijkstra_compact(graph, start_node, target, stats)
+
     distances = {node: float('infinity') for node in graph.get_nodes()}
     distances[start_node] = 0
     previous_nodes = {node: None for node in graph.get_nodes()}
-    unvisited = list(graph.get_nodes())
+    visited = set()
 
-    while unvisited:
-        current_node = min(unvisited, key=lambda node: distances[node])
-        unvisited.remove(current_node)
+    # Binary heap with lazy deletion: stale entries are skipped when popped.
+    # The counter breaks ties so node labels never have to be comparable.
+    tie = count()
+    heap = [(0, next(tie), start_node)]
 
-        if distances[current_node] == float('infinity'):
+    while heap:
+        current_distance, _, current_node = heapq.heappop(heap)
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+
+        # Once the target is settled its distance and path are final.
+        if current_node == target:
             break
 
-        for neighbor in graph.get_neighbors(current_node):
-            weight = graph.get_edge_weight(current_node, neighbor)
-            tentative_distance = distances[current_node] + weight
+        for neighbor, weight in graph.get_weighted_neighbors(current_node):
+            if neighbor in visited:
+                continue
+            tentative_distance = current_distance + weight
 
             if tentative_distance < distances[neighbor]:
                 distances[neighbor] = tentative_distance
                 previous_nodes[neighbor] = current_node
+                heapq.heappush(heap, (tentative_distance, next(tie), neighbor))
+
+    pushes = next(tie)
+    instrumentation.report(stats, settled=len(visited), relaxations=pushes - 1, pushes=pushes, pops=pushes - len(heap))
+    return distances, previous_nodes
+
+
+@instrumentation.timed('search')
+def dijkstra_ids(graph, source_id, target_id=None, stats=None, target_ids=None):
+    """Heap-based Dijkstra over a CompactGraph's integer ids.
+
+    Only ``graph.indptr``, ``graph.indices`` and ``graph.weights`` are used.
+    The search stops once ``target_id``, or every id in ``target_ids``, is
+    settled. Returns ``(dist, prev)`` as lists indexed by node id; ``prev``
+    holds -1 for the source and unreached nodes.
+    """
+    n = len(graph.indptr) - 1
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights
+    dist = [float('infinity')] * n
+    prev = [-1] * n
+    settled = [False] * n
+    dist[source_id] = 0
+    heap = [(0, source_id)]
+    num_settled = 0
+    pushes = 1
+    remaining = set(target_ids) if target_ids is not None else None
+
+    while heap:
+        current_distance, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = True
+        num_settled += 1
+        if u == target_id:
+            break
+        if remaining is not None:
+            remaining.discard(u)
+            if not remaining:
+                break
+
+        start, end = indptr[u], indptr[u + 1]
+        for v, weight in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+            if settled[v]:
+                continue
+            tentative_distance = current_distance + weight
+            if tentative_distance < dist[v]:
+                dist[v] = tentative_distance
+                prev[v] = u
+                heapq.heappush(heap, (tentative_distance, v))
+                pushes += 1
+
+    instrumentation.report(stats, settled=num_settled, relaxations=pushes - 1, pushes=pushes, pops=pushes - len(heap))
+    return dist, prev
+
+
+def _dijkstra_compact(graph, start_node, target=None, stats=None):
+    node_index = graph.node_index
+    target_id = node_index.get(target) if target is not None else None
+    dist, prev = dijkstra_ids(graph, node_index[start_node], target_id, stats)
+    nodes = graph.nodes
+    distances = dict(zip(nodes, dist))
+    previous_nodes = {node: nodes[p] if p >= 0 else None for node, p in zip(nodes, prev)}
+    return distances, previous_nodes
+
+
+@instrumentation.timed('reconstruct')
+def reconstruct_path(previous_nodes, start, end):
+    path = []
+    current = end
+    while current != start:
+        if current is None:
+            return None
+        path.append(current)
+        current = previous_nodes[current]
+    path.append(start)
+    return path[::-1]
+
+
+@instrumentation.timed('reconstruct')
+def reconstruct_path_ids(prev, source_id, target_id):
+    """``reconstruct_path`` over the id list ``dijkstra_ids`` returns."""
+    path = []
+    current = target_id
+    while current != source_id:
+        if current < 0:
+            return None
+        path.append(current)
+        current = prev[current]
+    path.append(source_id)
+    return path[::-1]
+
+
+@instrumentation.timed('search')
+def bidirectional_dijkstra(graph, start_node, end_node, stats=None):
+    """Point-to-point search growing one tree from each end.
+
+    Returns ``(path, distance)``, or ``(None, inf)`` if ``end_node`` is
+    unreachable. Assumes an undirected graph, as ``Graph`` builds.
+    """
+    if start_node == end_node:
+        instrumentation.report(stats, settled=1, relaxations=0, pushes=0, pops=0)
+        return [start_node], 0
+
+    tie = count()
+    # Index 0 is the forward search from start_node, 1 the backward one
+    dist = ({start_node: 0}, {end_node: 0})
+    prev = ({start_node: None}, {end_node: None})
+    settled = (set(), set())
+    heaps = ([(0, next(tie), start_node)], [(0, next(tie), end_node)])
+    best, meeting_node = float('infinity'), None
+
+    while heaps[0] and heaps[1]:
+        # No path through unsettled nodes can beat the best meeting point
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        other = 1 - side
+
+        current_distance, _, current_node = heapq.heappop(heaps[side])
+        if current_node in settled[side]:
+            continue
+        settled[side].add(current_node)
+
+        for neighbor, weight in graph.get_weighted_neighbors(current_node):
+            if neighbor in settled[side]:
+                continue
+            tentative_distance = current_distance + weight
+            if tentative_distance < dist[side].get(neighbor, float('infinity')):
+                dist[side][neighbor] = tentative_distance
+                prev[side][neighbor] = current_node
+                heapq.heappush(heaps[side], (tentative_distance, next(tie), neighbor))
+            if neighbor in dist[other]:
+                candidate = tentative_distance + dist[other][neighbor]
+                if candidate < best:
+                    best, meeting_node = candidate, neighbor
+
+    pushes = next(tie)
+    instrumentation.report(stats, settled=len(settled[0]) + len(settled[1]), relaxations=pushes - 2, pushes=pushes,
+                           pops=pushes - len(heaps[0]) - len(heaps[1]))
+    if meeting_node is None:
+        return None, float('infinity')
+
+    path = reconstruct_path(prev[0], start_node, meeting_node)
+    current = prev[1][meeting_node]
+    while current is not None:
+        path.append(current)
+        current = prev[1][current]
+    return path, best
+
+
+def euclidean_heuristic(positions, end_node):
+    target_x, target_y = positions[end_node]
+
+    def heuristic(node):
+        x, y = positions[node]
+        return math.hypot(x - target_x, y - target_y)
+
+    return heuristic
+
+
+@instrumentation.timed('search')
+def astar(graph, start_node, end_node, heuristic=None, stats=None):
+    """A* search guided by ``heuristic(node)``.
+
+    Defaults to the straight-line distance between the graph's stored
+    positions, which only gives shortest paths when edge weights are at
+    least the Euclidean length of the edge (i.e. the weights are geometric).
+    Returns ``(path, distance)`` like ``bidirectional_dijkstra``.
+    """
+    if heuristic is None:
+        heuristic = euclidean_heuristic(graph.get_positions(), end_node)
+
+    tie = count()
+    distances = {start_node: 0}
+    previous_nodes = {start_node: None}
+    visited = set()
+    heap = [(heuristic(start_node), next(tie), start_node)]
+
+    while heap:
+        _, _, current_node = heapq.heappop(heap)
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        if current_node == end_node:
+            break
+
+        current_distance = distances[current_node]
+        for neighbor, weight in graph.get_weighted_neighbors(current_node):
+            if neighbor in visited:
+                continue
+            tentative_distance = current_distance + weight
+            if tentative_distance < distances.get(neighbor, float('infinity')):
+                distances[neighbor] = tentative_distance
+                previous_nodes[neighbor] = current_node
+                heapq.heappush(heap, (tentative_distance + heuristic(neighbor), next(tie), neighbor))
+
+    pushes = next(tie)
+    instrumentation.report(stats, settled=len(visited), relaxations=pushes - 1, pushes=pushes, pops=pushes - len(heap))
+    if end_node not in visited:
+        return None, float('infinity')
+    return reconstruct_path(previous_nodes, start_node, end_node), distances[end_node]
+
+
+SEARCH_METHODS = ('dijkstra', 'bidirectional', 'astar')
+
+
+def shortest_path(graph, start_node, end_node, method='dijkstra', stats=None):
+    """Shortest ``(path, distance)`` from ``start_node`` to ``end_node``.
+
+    ``method`` is one of ``SEARCH_METHODS``. Pass a dict as ``stats`` to get
+    the search's counters back: ``settled`` nodes, successful edge
+    ``relaxations`` and heap ``pushes``/``pops``. Inside
+    ``instrumentation.collect()`` the same counters and the phase timings
+    are also summed into the active ``QueryStats``.
+    """
+    if method == 'bidirectional':
+        return bidirectional_dijkstra(graph, start_node, end_node, stats=stats)
+    if method == 'astar':
+        return astar(graph, start_node, end_node, stats=stats)
+    if method != 'dijkstra':
+        raise ValueError(f"Unknown search method: {method!r}")
+
+    if hasattr(graph, 'indptr'):
+        # Stay on ids: turning the V-length lists into label dicts costs more than a short search
+        node_index, nodes = graph.node_index, graph.nodes
+        source_id, target_id = node_index[start_node], node_index[end_node]
+        dist, prev = dijkstra_ids(graph, source_id, target_id, stats=stats)
+        path_ids = reconstruct_path_ids(prev, source_id, target_id)
+        return (None if path_ids is None else [nodes[i] for i in path_ids]), dist[target_id]
 
-    return distances, previous_nodes
\ No newline at end of file
+    distances, previous_nodes = dijkstra(graph, start_node, target=end_node, stats=stats)
+    path = reconstruct_path(previous_nodes, start_node, end_node)
+    return path, distances[end_node]
@@ -0,0 +1,100 @@
+import os
+from multiprocessing import Pool, shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from dijkstra import dijkstra_ids
+
+# Per-worker state, filled in once by _init_worker so tasks only carry row numbers
+_worker = {}
+
+
+def distance_matrix(graph, sources, targets=None, processes=None, chunksize=None):
+    """Shortest-path distances from every source to every target.
+
+    Returns a ``len(sources) x len(targets)`` float64 array with ``inf`` for
+    unreachable pairs; ``targets`` defaults to ``sources``. A plain ``Graph``
+    is frozen first. Searches run on a process pool of ``processes`` workers
+    (default: all cores) that attach to the CSR arrays and the result matrix
+    through shared memory, so the graph is never pickled per task. Each
+    search stops once all targets are settled.
+    """
+    if not hasattr(graph, 'indptr'):
+        graph = graph.freeze()
+    if targets is None:
+        targets = sources
+    source_ids = [graph.node_index[node] for node in sources]
+    target_ids = [graph.node_index[node] for node in targets]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(source_ids)))
+
+    if processes == 1:
+        result = np.empty((len(source_ids), len(target_ids)))
+        for row, source_id in enumerate(source_ids):
+            result[row] = _search_row(graph, source_id, target_ids)
+        return result
+
+    blocks = {}
+    try:
+        for name, array in (('indptr', graph.indptr), ('indices', graph.indices), ('weights', graph.weights)):
+            blocks[name] = _share(array)
+        result_shape = (len(source_ids), len(target_ids))
+        blocks['result'] = _share_empty(result_shape, np.float64)
+
+        specs = {name: (block.name, shape, dtype) for name, (block, shape, dtype) in blocks.items()}
+        if chunksize is None:
+            chunksize = max(1, len(source_ids) // (processes * 4))
+        rows = list(enumerate(source_ids))
+        with Pool(processes, initializer=_init_worker, initargs=(specs, target_ids)) as pool:
+            for _ in pool.imap_unordered(_worker_rows, _chunks(rows, chunksize)):
+                pass
+
+        block, shape, dtype = blocks['result']
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf).copy()
+    finally:
+        for block, _, _ in blocks.values():
+            block.close()
+            block.unlink()
+
+
+def _search_row(graph, source_id, target_ids):
+    dist, _ = dijkstra_ids(graph, source_id, target_ids=target_ids)
+    return [dist[target_id] for target_id in target_ids]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _share(array):
+    block, shape, dtype = _share_empty(array.shape, array.dtype)
+    np.ndarray(shape, dtype=dtype, buffer=block.buf)[...] = array
+    return block, shape, dtype
+
+
+def _share_empty(shape, dtype):
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return block, shape, dtype
+
+
+def _init_worker(specs, target_ids):
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker.setdefault('blocks', []).append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _worker['graph'] = SimpleNamespace(indptr=arrays['indptr'], indices=arrays['indices'], weights=arrays['weights'])
+    _worker['result'] = arrays['result']
+    _worker['target_ids'] = target_ids
+
+
+def _worker_rows(rows):
+    graph, result, target_ids = _worker['graph'], _worker['result'], _worker['target_ids']
+    for row, source_id in rows:
+        result[row] = _search_row(graph, source_id, target_ids)
+    return len(rows)
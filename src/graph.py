@@ -4,6 +4,9 @@ class Graph:
     def __init__(self):
         self.edges = {}
         self.positions = {}
+        # Bumped on every edge change so caches can tell when they are stale
+        self.version = 0
+        self.edge_listeners = []
 
     def add_node(self, node):
         if node not in self.edges:
@@ -14,8 +17,19 @@ class Graph:
     def add_edge(self, node1, node2, weight):
         self.add_node(node1)
         self.add_node(node2)
+        old_weight = self.edges[node1].get(node2)
         self.edges[node1][node2] = weight
         self.edges[node2][node1] = weight  # Assuming undirected graph
+        self.version += 1
+        for listener in self.edge_listeners:
+            listener(node1, node2, old_weight, weight)
+
+    def add_edge_listener(self, listener):
+        # listener(node1, node2, old_weight, new_weight); old_weight is None for a new edge
+        self.edge_listeners.append(listener)
+
+    def remove_edge_listener(self, listener):
+        self.edge_listeners.remove(listener)
 
     def get_nodes(self):
         return list(self.edges.keys())
@@ -23,6 +37,9 @@ class Graph:
     def get_neighbors(self, node):
         return list(self.edges[node].keys())
 
+    def get_weighted_neighbors(self, node):
+        return self.edges[node].items()
+
     def get_edge_weight(self, node1, node2):
         return self.edges[node1][node2]
 
@@ -41,4 +58,9 @@ class Graph:
 
     def set_position(self, node, pos):
         self.positions[node] = pos
+
+    def freeze(self, dtype='float64'):
+        # Imported here so plain Graph use doesn't require NumPy
+        from compact_graph import CompactGraph
+        return CompactGraph.from_graph(self, dtype=dtype)
         
\ No newline at end of file
@@ -0,0 +1,255 @@
+import io
+import json
+import os
+from itertools import islice
+
+import numpy as np
+
+from compact_graph import CompactGraph
+
+CHUNK_LINES = 1 << 18
+
+SNAPSHOT_MAGIC = b'DJKGRAPH'
+SNAPSHOT_VERSION = 1
+_ALIGN = 64
+
+
+def _text_lines(source):
+    # Accept a path, a text file, or a binary file such as a Streamlit upload
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding='utf-8')
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8')
+
+
+def _chunks(lines, chunk_lines):
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_csv_edges(source, delimiter=',', header=None, default_weight=1.0, chunk_lines=CHUNK_LINES, dtype=np.float64):
+    """Load an undirected ``source,target[,weight]`` edge list.
+
+    Lines are parsed ``chunk_lines`` at a time straight into NumPy arrays.
+    Node labels are kept as strings, as the "Add Edge" form produces them.
+    ``header=None`` skips the first line only if it has a weight column that
+    isn't numeric; a two-column file needs ``header=True`` to skip one.
+    """
+    label_chunks, weight_chunks = [], []
+    lines = _text_lines(source)
+    with lines:
+        for chunk in _chunks(lines, chunk_lines):
+            if header is None:
+                fields = chunk[0].strip().split(delimiter)
+                header = len(fields) >= 3 and not _is_number(fields[2])
+            if header:
+                chunk = chunk[1:]
+                header = False
+            chunk = [line for line in chunk if line.strip()]
+            if not chunk:
+                continue
+            table = np.loadtxt(chunk, delimiter=delimiter, dtype=str, ndmin=2, comments=None)
+            if table.shape[1] < 2:
+                raise ValueError(f"Expected source{delimiter}target[{delimiter}weight] rows, got {chunk[0].strip()!r}")
+            label_chunks.append(table[:, :2])
+            if table.shape[1] >= 3:
+                weight_chunks.append(table[:, 2].astype(dtype))
+            else:
+                weight_chunks.append(np.full(len(table), default_weight, dtype=dtype))
+
+    if not label_chunks:
+        return CompactGraph.from_edge_arrays(0, [], [], [], nodes=[], dtype=dtype)
+    labels = np.char.strip(np.concatenate(label_chunks))
+    nodes, ids = np.unique(labels, return_inverse=True)
+    ids = ids.reshape(labels.shape)
+    return CompactGraph.from_edge_arrays(len(nodes), ids[:, 0], ids[:, 1], np.concatenate(weight_chunks),
+                                         nodes=nodes.tolist(), dtype=dtype)
+
+
+def read_dimacs(source, chunk_lines=CHUNK_LINES, dtype=np.float64):
+    """Load a DIMACS shortest-path ``.gr`` file.
+
+    Arcs are treated as undirected edges (road graphs list both directions
+    anyway). Node labels are the file's 1-based ids.
+    """
+    num_nodes = None
+    arc_chunks = []
+    lines = _text_lines(source)
+    with lines:
+        for chunk in _chunks(lines, chunk_lines):
+            if num_nodes is None:
+                for line in chunk:
+                    if line.startswith('p'):
+                        num_nodes = int(line.split()[2])
+                        break
+            arcs = [line[1:] for line in chunk if line.startswith('a')]
+            if arcs:
+                arc_chunks.append(np.loadtxt(arcs, dtype=np.float64, ndmin=2))
+
+    if num_nodes is None:
+        raise ValueError("DIMACS file has no 'p sp <nodes> <arcs>' problem line")
+    arcs = np.concatenate(arc_chunks) if arc_chunks else np.empty((0, 3))
+    return CompactGraph.from_edge_arrays(num_nodes, arcs[:, 0].astype(np.int64) - 1, arcs[:, 1].astype(np.int64) - 1,
+                                         arcs[:, 2], nodes=range(1, num_nodes + 1), dtype=dtype)
+
+
+def read_matrix_market(source, chunk_lines=CHUNK_LINES, dtype=np.float64):
+    """Load a square Matrix Market ``coordinate`` matrix as an adjacency matrix.
+
+    Entry (i, j, v) becomes an undirected edge of weight v; ``pattern``
+    matrices get weight 1. Node labels are the file's 1-based indices.
+    """
+    lines = _text_lines(source)
+    with lines:
+        banner = lines.readline().lower().split()
+        if len(banner) < 4 or banner[0] != '%%matrixmarket' or banner[2] != 'coordinate':
+            raise ValueError("Only Matrix Market 'coordinate' files are supported")
+        pattern = banner[3] == 'pattern'
+        for line in lines:
+            if line.strip() and not line.startswith('%'):
+                rows, cols, _ = (int(field) for field in line.split())
+                break
+        else:
+            raise ValueError("Matrix Market file has no size line")
+        if rows != cols:
+            raise ValueError(f"Adjacency matrix must be square, got {rows}x{cols}")
+
+        entry_chunks = []
+        for chunk in _chunks(lines, chunk_lines):
+            chunk = [line for line in chunk if line.strip() and not line.startswith('%')]
+            if chunk:
+                entry_chunks.append(np.loadtxt(chunk, dtype=np.float64, ndmin=2))
+
+    entries = np.concatenate(entry_chunks) if entry_chunks else np.empty((0, 3))
+    weights = np.ones(len(entries)) if pattern else entries[:, 2]
+    return CompactGraph.from_edge_arrays(rows, entries[:, 0].astype(np.int64) - 1, entries[:, 1].astype(np.int64) - 1,
+                                         weights, nodes=range(1, rows + 1), dtype=dtype)
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def save_snapshot(graph, path):
+    """Write a CompactGraph (or Graph, frozen first) as a binary snapshot.
+
+    Layout: 8-byte magic, 8-byte little-endian header length, a JSON header,
+    then each array's raw bytes at a 64-byte aligned offset so
+    ``open_snapshot`` can memory-map them without parsing.
+    """
+    if not hasattr(graph, 'indptr'):
+        graph = graph.freeze()
+
+    arrays = {'indptr': graph.indptr, 'indices': graph.indices, 'weights': graph.weights, 'coords': graph.coords}
+    nodes = graph.nodes
+    if isinstance(nodes, range):
+        labels = {'kind': 'range', 'start': nodes.start}
+    elif all(isinstance(node, str) for node in nodes):
+        encoded = [node.encode('utf-8') for node in nodes]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(label) for label in encoded], out=offsets[1:])
+        arrays['label_offsets'] = offsets
+        arrays['label_bytes'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        labels = {'kind': 'str'}
+    elif all(isinstance(node, int) for node in nodes):
+        arrays['labels'] = np.array(nodes, dtype=np.int64)
+        labels = {'kind': 'int'}
+    else:
+        raise TypeError("Snapshots support str or int node labels only")
+
+    # Offsets are relative to the end of the header, so they don't depend on its length
+    entries, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({'version': SNAPSHOT_VERSION, 'num_nodes': len(nodes), 'labels': labels,
+                         'arrays': entries}).encode('utf-8')
+    header += b' ' * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % _ALIGN)
+
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        base = f.tell()
+        for name, array in arrays.items():
+            f.seek(base + entries[name]['offset'])
+            f.write(array.tobytes())
+
+
+def open_snapshot(source):
+    """Open a snapshot written by ``save_snapshot``.
+
+    Given a path, the arrays are memory-mapped read-only, so opening costs
+    only the header parse (plus decoding string labels, if any). Bytes or a
+    binary file object are read into memory instead.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            prefix = f.read(len(SNAPSHOT_MAGIC) + 8)
+            header_length = int.from_bytes(prefix[len(SNAPSHOT_MAGIC):], 'little')
+            header = f.read(header_length)
+        buffer = None
+    else:
+        buffer = source if isinstance(source, (bytes, bytearray, memoryview)) else source.read()
+        prefix = bytes(buffer[:len(SNAPSHOT_MAGIC) + 8])
+        header_length = int.from_bytes(prefix[len(SNAPSHOT_MAGIC):], 'little')
+        header = bytes(buffer[len(prefix):len(prefix) + header_length])
+
+    if prefix[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a graph snapshot")
+    header = json.loads(header)
+    if header['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['version']}")
+    base = len(prefix) + header_length
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            # Trailing empty arrays are recorded past the end of the file
+            arrays[name] = np.empty(shape, dtype=dtype)
+        elif buffer is None:
+            # Plain ndarray view of the map: slicing a memmap subclass is much slower
+            arrays[name] = np.asarray(np.memmap(source, dtype=dtype, mode='r', offset=base + entry['offset'], shape=shape))
+        else:
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=base + entry['offset']).reshape(shape)
+
+    labels = header['labels']
+    if labels['kind'] == 'range':
+        nodes = range(labels['start'], labels['start'] + header['num_nodes'])
+    elif labels['kind'] == 'int':
+        nodes = arrays['labels'].tolist()
+    else:
+        data, offsets = bytes(arrays['label_bytes']), arrays['label_offsets'].tolist()
+        nodes = [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+    return CompactGraph(nodes, arrays['indptr'], arrays['indices'], arrays['weights'], arrays['coords'])
+
+
+LOADERS = {
+    '.csv': read_csv_edges,
+    '.gr': read_dimacs,
+    '.mtx': read_matrix_market,
+    '.djkg': open_snapshot,
+}
+
+
+def load_graph(source, name=None, **options):
+    """Pick a loader from the file extension of ``name`` (or ``source``).
+
+    ``options`` are passed on to the loader, e.g. ``header`` for CSV files.
+    """
+    extension = os.path.splitext(name if name is not None else os.fspath(source))[1].lower()
+    if extension not in LOADERS:
+        raise ValueError(f"Unsupported graph file type: {extension or name}")
+    return LOADERS[extension](source, **options)
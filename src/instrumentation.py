@@ -0,0 +1,218 @@
+import cProfile
+import functools
+import marshal
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+PHASES = ('search', 'reconstruct', 'layout', 'render', 'encode')
+
+# Stats object receiving counters and timings; None means instrumentation is off
+_active = ContextVar('instrumentation_stats', default=None)
+
+
+class QueryStats:
+    """Counters and per-phase timings gathered while ``collect`` is active.
+
+    ``counters`` sums what the searches report (settled nodes, relaxations,
+    heap pushes and pops). ``timings`` and ``calls`` are keyed by phase
+    name. Time spent in a nested phase counts only towards that phase, so
+    the timings add up to at most the wall time; a phase nested in itself
+    is only timed once. With ``track_allocations`` every phase also records
+    the net and peak bytes allocated, via tracemalloc, in ``allocations``;
+    those include nested phases.
+    """
+
+    def __init__(self, track_allocations=False):
+        self.counters = {}
+        self.timings = {}
+        self.calls = {}
+        self.allocations = {}
+        self.track_allocations = track_allocations
+        self._open = []
+
+    def count(self, **counters):
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name):
+        if any(entry[0] == name for entry in self._open):
+            yield
+            return
+        if self.track_allocations:
+            memory_before, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak would hide it from enclosing phases, so hand it to them first
+            for entry in self._open:
+                entry[1] = max(entry[1], peak)
+            tracemalloc.reset_peak()
+        # [name, peak bytes seen by nested phases, seconds spent in nested phases]
+        entry = [name, 0, 0.0]
+        self._open.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - entry[2]
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self._open.pop()
+            if self._open:
+                self._open[-1][2] += elapsed
+            if self.track_allocations:
+                memory_after, peak = tracemalloc.get_traced_memory()
+                net, max_peak = self.allocations.get(name, (0, 0))
+                peak = max(peak, entry[1]) - memory_before
+                self.allocations[name] = (net + memory_after - memory_before, max(max_peak, peak))
+
+    def as_dict(self):
+        stats = {'counters': dict(self.counters),
+                 'phases': {name: {'seconds': self.timings[name], 'calls': self.calls[name]} for name in self.timings}}
+        for name, (net, peak) in self.allocations.items():
+            stats['phases'][name].update(allocated_bytes=net, peak_bytes=peak)
+        return stats
+
+    def __bool__(self):
+        return bool(self.counters or self.timings)
+
+    def __str__(self):
+        lines = [f"{name:>12} {value}" for name, value in self.counters.items()]
+        for name, seconds in self.timings.items():
+            line = f"{name:>12} {seconds * 1e3:9.3f}ms x{self.calls[name]}"
+            if name in self.allocations:
+                net, peak = self.allocations[name]
+                line += f"  net {net / 1024:.1f}KiB peak {peak / 1024:.1f}KiB"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect(stats=None, track_allocations=False):
+    """Turn instrumentation on for the block and yield the stats object.
+
+    Pass an existing ``QueryStats`` to keep adding to it.
+    """
+    if stats is None:
+        stats = QueryStats(track_allocations=track_allocations)
+    started_tracing = stats.track_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _active.set(stats)
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def active():
+    return _active.get()
+
+
+def count(**counters):
+    stats = _active.get()
+    if stats is not None:
+        stats.count(**counters)
+
+
+def report(stats, **counters):
+    # Searches report once at the end, so their loops pay nothing when nobody is listening
+    if stats is not None:
+        stats.update(counters)
+    count(**counters)
+
+
+def phase(name):
+    stats = _active.get()
+    return nullcontext() if stats is None else stats.phase(name)
+
+
+def timed(name):
+    """Decorator timing every call of the function as phase ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = _active.get()
+            if stats is None:
+                return func(*args, **kwargs)
+            with stats.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(path=None):
+    """cProfile the block; the profile is dumped to ``path`` (pstats format) if given."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+
+
+class StackProfiler:
+    """Exact call-stack timer producing folded stacks for flame graphs.
+
+    Every Python and C call in the block is traced through ``sys.setprofile``,
+    so it is far slower than cProfile; use it on a single query. ``folded``
+    maps ``"outer;inner;leaf"`` stacks to self time in seconds, the input
+    flamegraph.pl and speedscope expect.
+    """
+
+    def __init__(self):
+        self.folded = {}
+        self._stack = []
+
+    @staticmethod
+    def _frame_name(frame, event, arg):
+        if event.startswith('c_'):
+            return getattr(arg, '__qualname__', getattr(arg, '__name__', repr(arg)))
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        if event in ('call', 'c_call'):
+            self._stack.append([self._frame_name(frame, event, arg), now, 0.0])
+        elif self._stack:
+            name, start, children = self._stack.pop()
+            elapsed = now - start
+            key = ';'.join([entry[0] for entry in self._stack] + [name])
+            self.folded[key] = self.folded.get(key, 0.0) + elapsed - children
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def __enter__(self):
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.setprofile(None)
+        self._stack.clear()
+
+    def text(self):
+        # Sample counts are whole microseconds
+        lines = []
+        for stack, seconds in sorted(self.folded.items()):
+            micros = round(seconds * 1e6)
+            if micros > 0:
+                lines.append(f"{stack} {micros}\n")
+        return ''.join(lines)
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write(self.text())
+
+
+def profile_bytes(profiler):
+    """A finished cProfile run in the format ``dump_stats`` writes, for pstats or snakeviz."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
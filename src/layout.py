@@ -0,0 +1,191 @@
+import math
+import random
+
+import instrumentation
+
+
+class SpatialGrid:
+    """Uniform grid of buckets for fixed-radius neighbour queries.
+
+    With ``cell_size`` at least the query radius, a query only looks at the
+    3x3 block of cells around the point, so it costs O(1) for evenly spread
+    points no matter how many there are.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _cell(self, pos):
+        return int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)
+
+    def insert(self, node, pos):
+        self.cells.setdefault(self._cell(pos), []).append((node, pos))
+
+    def remove(self, node, pos):
+        bucket = self.cells[self._cell(pos)]
+        bucket.remove((node, pos))
+        if not bucket:
+            del self.cells[self._cell(pos)]
+
+    def within(self, pos, radius):
+        """Yield ``(node, pos)`` for every stored point closer than ``radius``."""
+        cx, cy = self._cell(pos)
+        reach = max(1, math.ceil(radius / self.cell_size))
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for node, other in self.cells.get((x, y), ()):
+                    if (other[0] - pos[0]) ** 2 + (other[1] - pos[1]) ** 2 < radius * radius:
+                        yield node, other
+
+
+class Layout:
+    """Incremental node placement in the unit square.
+
+    New nodes are placed by Poisson-disk sampling: candidates are drawn in
+    an annulus around an already placed neighbour (or anywhere, for a node
+    with none) and the first one at least ``spacing`` from every other node
+    wins. The spacing shrinks as ~1/sqrt(n) so the square never fills up.
+    A few rounds of force-directed refinement then move only the new node
+    and its low-degree neighbours, each pulled by at most a sample of its
+    own neighbours. Everything goes through a ``SpatialGrid``, so adding a
+    node stays roughly O(1) amortized even next to a hub.
+    """
+
+    MAX_SPACING = 0.2  # the gap the app always used between nodes
+    CANDIDATES = 30
+    MAX_PULLS = 8  # neighbours sampled for each node's attraction in refine
+    MOVABLE_DEGREE = 8  # add_node leaves better-connected neighbours where they are
+
+    def __init__(self, graph=None, positions=None, seed=None):
+        self.graph = graph
+        self.positions = {}
+        self.rng = random.Random(seed)
+        self.grid = SpatialGrid(self.MAX_SPACING)
+        # How far out the last node placed next to each hub had to go
+        self.reach = {}
+        for node, pos in (positions or {}).items():
+            self._insert(node, tuple(pos))
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def spacing(self):
+        # Roughly the largest gap n points can keep in the unit square
+        return min(self.MAX_SPACING, 0.7 / math.sqrt(len(self.positions) + 1))
+
+    def _insert(self, node, pos):
+        self.positions[node] = pos
+        self.grid.insert(node, pos)
+        # Rebuild with smaller cells once spacing has halved; this keeps
+        # buckets small and happens O(log n) times in total.
+        if self.grid.cell_size > 2 * self.spacing:
+            self.grid = SpatialGrid(self.spacing)
+            for other, other_pos in self.positions.items():
+                self.grid.insert(other, other_pos)
+
+    def _move(self, node, pos):
+        self.grid.remove(node, self.positions[node])
+        self.positions[node] = pos
+        self.grid.insert(node, pos)
+
+    def _is_free(self, pos, radius, ignore=None):
+        return all(node == ignore for node, _ in self.grid.within(pos, radius))
+
+    def _is_hub(self, node):
+        return self.graph is not None and len(self.graph.edges.get(node, ())) > self.MOVABLE_DEGREE
+
+    def _neighbors(self, node):
+        if self.graph is None or node not in self.graph.edges:
+            return []
+        return [neighbor for neighbor in self.graph.get_neighbors(node) if neighbor in self.positions]
+
+    @instrumentation.timed('layout')
+    def place(self, node, near=()):
+        """Pick a free position for ``node`` and insert it, without refinement."""
+        if node in self.positions:
+            return self.positions[node]
+        anchors = [other for other in near if other in self.positions]
+        radius = self.spacing
+        # Around a hub, start where the last placement succeeded so its full
+        # inner rings aren't retried every time
+        reach = min([self.reach.get(other, 2 * radius) for other in anchors], default=2 * radius)
+        while True:
+            for _ in range(self.CANDIDATES):
+                if anchors:
+                    anchor = self.rng.choice(anchors)
+                    ax, ay = self.positions[anchor]
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    distance = self.rng.uniform(radius, reach)
+                    pos = (ax + distance * math.cos(angle), ay + distance * math.sin(angle))
+                    if not (0 <= pos[0] <= 1 and 0 <= pos[1] <= 1):
+                        continue
+                else:
+                    pos = (self.rng.random(), self.rng.random())
+                if self._is_free(pos, radius):
+                    self._insert(node, pos)
+                    if anchors and self._is_hub(anchor):
+                        self.reach[anchor] = reach
+                    return pos
+            # Crowded here (say around a hub): look further out first, then
+            # relax the spacing rather than loop forever
+            if anchors and reach < 1.5:
+                reach *= 2
+                continue
+            if anchors and radius < self.spacing / 4:
+                anchors = []
+            radius *= 0.7
+
+    @instrumentation.timed('layout')
+    def refine(self, nodes, iterations=10):
+        """Local force-directed relaxation of ``nodes`` only.
+
+        Graph neighbours pull towards ``spacing`` apart; any node closer
+        than twice the spacing pushes away. Other nodes stay put.
+        """
+        ideal = self.spacing
+        step = ideal / 2
+        nodes = [node for node in nodes if node in self.positions]
+        # Sampled once, so a hub costs O(degree) per call rather than per iteration
+        pulls = {}
+        for node in nodes:
+            neighbors = self._neighbors(node)
+            if len(neighbors) > self.MAX_PULLS:
+                neighbors = self.rng.sample(neighbors, self.MAX_PULLS)
+            pulls[node] = neighbors
+        for _ in range(iterations):
+            for node in nodes:
+                x, y = self.positions[node]
+                fx = fy = 0.0
+                for other, (ox, oy) in self.grid.within((x, y), 2 * ideal):
+                    if other == node:
+                        continue
+                    dx, dy = x - ox, y - oy
+                    d = math.hypot(dx, dy) or 1e-9
+                    force = ideal * ideal / d
+                    fx += dx / d * force
+                    fy += dy / d * force
+                for other in pulls[node]:
+                    ox, oy = self.positions[other]
+                    dx, dy = ox - x, oy - y
+                    d = math.hypot(dx, dy) or 1e-9
+                    force = d * d / ideal
+                    fx += dx / d * force
+                    fy += dy / d * force
+                length = math.hypot(fx, fy)
+                if length > 0:
+                    move = min(step, length)
+                    pos = (min(1.0, max(0.0, x + fx / length * move)), min(1.0, max(0.0, y + fy / length * move)))
+                    self._move(node, pos)
+            step *= 0.8
+
+    def add_node(self, node, iterations=10):
+        """Place ``node`` next to its placed graph neighbours and settle its neighbourhood."""
+        if node in self.positions:
+            return self.positions[node]
+        neighbors = self._neighbors(node)
+        self.place(node, near=neighbors)
+        movable = [other for other in neighbors if not self._is_hub(other)]
+        self.refine([node] + movable, iterations=iterations)
+        return self.positions[node]
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+
+async def _request(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_load(url, num_requests, concurrency, hot_sources, hot_fraction, endpoint, seed):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, listing = await _request(reader, writer, host, f"/nodes?limit={max(1000, hot_sources)}")
+    writer.close()
+    nodes = listing['nodes']
+
+    rng = random.Random(seed)
+    hot = rng.sample(nodes, min(hot_sources, len(nodes)))
+    # A share of queries reuse a few hot sources, as depot-style traffic does
+    queries = [(rng.choice(hot) if rng.random() < hot_fraction else rng.choice(nodes), rng.choice(nodes))
+               for _ in range(num_requests)]
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while not queue.empty():
+                source, target = queue.get_nowait()
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, host,
+                                           f"/{endpoint}?" + urlencode({'source': source, 'target': target}))
+                latencies.append((time.perf_counter() - start) * 1e3)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await _request(reader, writer, host, "/stats")
+    writer.close()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+        'server': server_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for server.py.")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--hot-sources', type=int, default=10)
+    parser.add_argument('--hot-fraction', type=float, default=0.8)
+    parser.add_argument('--endpoint', choices=['path', 'distance'], default='path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args.url, args.requests, args.concurrency, args.hot_sources,
+                                  args.hot_fraction, args.endpoint, args.seed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import heapq
+import sys
+from collections import OrderedDict
+from itertools import count
+
+import instrumentation
+from dijkstra import reconstruct_path
+
+
+class _Tree:
+    __slots__ = ('distances', 'previous_nodes', 'settled', 'heap', 'tie', 'version', 'size')
+
+    def __init__(self, source, version):
+        self.distances = {source: 0}
+        self.previous_nodes = {source: None}
+        # Search state kept so a later query can resume it; dropped once the tree is complete
+        self.settled = set()
+        self.tie = count()
+        self.heap = [(0, next(self.tie), source)]
+        self.version = version
+        self.size = _tree_size(self)
+
+    @property
+    def complete(self):
+        return self.heap is None
+
+
+def _tree_size(tree):
+    # Both dicts plus one boxed float per distance, and for a partial tree
+    # the settled set and heap entries; node labels are shared with the graph
+    # and not counted.
+    size = sys.getsizeof(tree.distances) + sys.getsizeof(tree.previous_nodes) + 24 * len(tree.distances)
+    if not tree.complete:
+        size += sys.getsizeof(tree.settled) + sys.getsizeof(tree.heap) + 88 * len(tree.heap)
+    return size
+
+
+class ShortestPathCache:
+    """Per-source shortest-path trees for a Graph, kept in sync with edits.
+
+    A query only grows its source's tree until the target is settled; the
+    settled set and heap are kept so a later query from the same source
+    resumes the search instead of starting over. Trees are tagged with
+    ``graph.version``. New or cheaper edges are repaired in place on complete
+    trees by re-relaxing only the part whose distances drop, while partial
+    trees are dropped; a weight increase on an edge a tree uses drops that
+    tree so the next query recomputes it. Least recently used trees are
+    evicted once their estimated size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, graph, max_bytes=64 * 2**20):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        self.nbytes = 0
+        graph.add_edge_listener(self.on_edge_change)
+
+    def close(self):
+        self.graph.remove_edge_listener(self.on_edge_change)
+        self.clear()
+
+    def clear(self):
+        self.trees.clear()
+        self.nbytes = 0
+
+    def __contains__(self, source):
+        tree = self.trees.get(source)
+        return tree is not None and tree.version == self.graph.version
+
+    def _lookup(self, source):
+        tree = self.trees.get(source)
+        if tree is None or tree.version != self.graph.version:
+            tree = _Tree(source, self.graph.version)
+            self._store(source, tree)
+        else:
+            self.trees.move_to_end(source)
+        return tree
+
+    def _grow(self, tree, target=None, stats=None):
+        # Resumable Dijkstra: runs until target is settled, or to completion
+        distances, previous_nodes = tree.distances, tree.previous_nodes
+        settled, heap, tie = tree.settled, tree.heap, tree.tie
+        settled_before = len(settled)
+        pushes = pops = 0
+
+        while heap:
+            current_distance, _, current_node = heapq.heappop(heap)
+            pops += 1
+            if current_node in settled:
+                continue
+            settled.add(current_node)
+
+            for neighbor, weight in self.graph.get_weighted_neighbors(current_node):
+                if neighbor in settled:
+                    continue
+                tentative_distance = current_distance + weight
+                if tentative_distance < distances.get(neighbor, float('infinity')):
+                    distances[neighbor] = tentative_distance
+                    previous_nodes[neighbor] = current_node
+                    heapq.heappush(heap, (tentative_distance, next(tie), neighbor))
+                    pushes += 1
+
+            # Stop only after relaxing the target's edges, so a resumed search misses nothing
+            if current_node == target:
+                break
+        else:
+            tree.settled = tree.heap = tree.tie = None
+
+        instrumentation.report(stats, settled=len(settled) - settled_before, relaxations=pushes, pushes=pushes, pops=pops)
+        self._resize(tree)
+        self._evict()
+
+    def _hit(self, stats):
+        instrumentation.report(stats, settled=0, relaxations=0, pushes=0, pops=0)
+        instrumentation.count(cache_hits=1)
+
+    def tree(self, source, stats=None):
+        """Complete ``(distances, previous_nodes)`` for ``source``; unreachable nodes are absent."""
+        tree = self._lookup(source)
+        if tree.complete:
+            self._hit(stats)
+        else:
+            self._grow(tree, stats=stats)
+        return tree.distances, tree.previous_nodes
+
+    def shortest_path(self, source, target, stats=None):
+        tree = self._lookup(source)
+        if tree.complete or target in tree.settled:
+            self._hit(stats)
+        else:
+            self._grow(tree, target, stats=stats)
+        if target not in tree.distances:
+            return None, float('infinity')
+        return reconstruct_path(tree.previous_nodes, source, target), tree.distances[target]
+
+    def _store(self, source, tree):
+        self._discard(source)
+        self.trees[source] = tree
+        self.nbytes += tree.size
+        self._evict()
+
+    def _discard(self, source):
+        tree = self.trees.pop(source, None)
+        if tree is not None:
+            self.nbytes -= tree.size
+
+    def _resize(self, tree):
+        self.nbytes -= tree.size
+        tree.size = _tree_size(tree)
+        self.nbytes += tree.size
+
+    def _evict(self):
+        # Always keep the most recent tree, even if it alone is over budget
+        while self.nbytes > self.max_bytes and len(self.trees) > 1:
+            _, tree = self.trees.popitem(last=False)
+            self.nbytes -= tree.size
+
+    def on_edge_change(self, node1, node2, old_weight, new_weight):
+        version = self.graph.version
+        for source in list(self.trees):
+            tree = self.trees[source]
+            if tree.version != version - 1:
+                # Missed an update somewhere; let the next query recompute
+                self._discard(source)
+            elif old_weight is not None and new_weight > old_weight:
+                previous_nodes = tree.previous_nodes
+                if previous_nodes.get(node2) == node1 or previous_nodes.get(node1) == node2:
+                    self._discard(source)
+                else:
+                    # A dearer edge the tree doesn't use can't change any distance
+                    tree.version = version
+            elif not tree.complete:
+                # Repair assumes final distances everywhere; let the next query restart
+                self._discard(source)
+            else:
+                self._repair(tree, node1, node2, new_weight)
+                tree.version = version
+                self._resize(tree)
+        self._evict()
+
+    def _repair(self, tree, node1, node2, weight):
+        distances, previous_nodes = tree.distances, tree.previous_nodes
+        # An edge between two unreached nodes leaves the tree as it is; unreached nodes stay absent
+        if node1 not in distances and node2 not in distances:
+            return
+
+        tie = count()
+        heap = []
+        for u, v in ((node1, node2), (node2, node1)):
+            if u in distances and distances[u] + weight < distances.get(v, float('infinity')):
+                distances[v] = distances[u] + weight
+                previous_nodes[v] = u
+                heap.append((distances[v], next(tie), v))
+        heapq.heapify(heap)
+
+        # Distances only go down, so only nodes that improve need re-relaxing
+        while heap:
+            current_distance, _, current_node = heapq.heappop(heap)
+            if current_distance > distances[current_node]:
+                continue
+            for neighbor, edge_weight in self.graph.get_weighted_neighbors(current_node):
+                tentative_distance = current_distance + edge_weight
+                if tentative_distance < distances.get(neighbor, float('infinity')):
+                    distances[neighbor] = tentative_distance
+                    previous_nodes[neighbor] = current_node
+                    heapq.heappush(heap, (tentative_distance, next(tie), neighbor))
+
+        instrumentation.count(repair_pushes=next(tie))
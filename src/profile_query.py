@@ -0,0 +1,40 @@
+import argparse
+
+import instrumentation
+from dijkstra import SEARCH_METHODS, shortest_path
+from graph_io import load_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one shortest-path query and report where the time went.")
+    parser.add_argument('graph', help="graph file: .csv, .gr, .mtx or .djkg")
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--method', choices=SEARCH_METHODS, default='dijkstra')
+    parser.add_argument('--allocations', action='store_true', help="also track allocated bytes per phase")
+    parser.add_argument('--profile', metavar='PATH', help="write a cProfile dump of the query")
+    parser.add_argument('--flamegraph', metavar='PATH', help="write folded stacks of the query")
+    args = parser.parse_args()
+
+    graph = load_graph(args.graph)
+
+    nodes = graph.nodes
+    source, target = nodes[graph.lookup(args.source)], nodes[graph.lookup(args.target)]
+    with instrumentation.collect(track_allocations=args.allocations) as stats:
+        path, distance = shortest_path(graph, source, target, method=args.method)
+    print(f"distance {distance}, {len(path) if path else 0} nodes on the path")
+    print(stats)
+
+    if args.profile:
+        with instrumentation.profiled(args.profile):
+            shortest_path(graph, source, target, method=args.method)
+        print(f"cProfile dump written to {args.profile}")
+    if args.flamegraph:
+        with instrumentation.StackProfiler() as profiler:
+            shortest_path(graph, source, target, method=args.method)
+        profiler.write(args.flamegraph)
+        print(f"Folded stacks written to {args.flamegraph}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import heapq
+from array import array
+from itertools import count
+
+import numpy as np
+
+import instrumentation
+
+SETTLE = 0
+RELAX = 1
+
+
+class SearchTrace:
+    """Compact event log of one Dijkstra run.
+
+    Every settle and every successful relaxation is appended to four typed
+    arrays: event kind, node id, predecessor id (-1 for none) and the
+    node's tentative distance. Node ids index ``nodes``. Call ``state_at``
+    to look at the search after any number of events.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.kinds = array('b')
+        self.node_ids = array('q')
+        self.predecessors = array('q')
+        self.distances = array('d')
+        self._index = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def record(self, kind, node_id, predecessor_id, distance):
+        self.kinds.append(kind)
+        self.node_ids.append(node_id)
+        self.predecessors.append(predecessor_id)
+        self.distances.append(distance)
+        self._index = None
+
+    @property
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.kinds, self.node_ids, self.predecessors, self.distances))
+
+    def _build_index(self):
+        # Per-node step indices: a node is settled at step s iff its settle
+        # event comes before s, and its distance at s is its last relax event
+        # before s, found by binary search within that node's relax events.
+        n, total = len(self.nodes), len(self)
+        kinds = np.frombuffer(self.kinds, dtype=np.int8)
+        node_ids = np.frombuffer(self.node_ids, dtype=np.int64)
+        steps = np.arange(total)
+
+        settle_step = np.full(n, total + 1, dtype=np.int64)
+        settles = kinds == SETTLE
+        settle_step[node_ids[settles]] = steps[settles]
+        settle_predecessor = np.full(n, -1, dtype=np.int64)
+        settle_predecessor[node_ids[settles]] = np.frombuffer(self.predecessors, dtype=np.int64)[settles]
+
+        relaxes = np.flatnonzero(kinds == RELAX)
+        order = relaxes[np.argsort(node_ids[relaxes], kind='stable')]
+        relax_bounds = np.searchsorted(node_ids[order], np.arange(n + 1))
+        reach_step = np.full(n, total + 1, dtype=np.int64)
+        has_relax = relax_bounds[1:] > relax_bounds[:-1]
+        reach_step[has_relax] = order[relax_bounds[:-1][has_relax]]
+
+        self._index = settle_step, reach_step, order, relax_bounds, settle_predecessor
+
+    def state_at(self, step):
+        """The search after its first ``step`` events (0 <= step <= len(self))."""
+        if not 0 <= step <= len(self):
+            raise IndexError(f"step {step} out of range 0..{len(self)}")
+        if self._index is None:
+            self._build_index()
+        return ReplayState(self, step)
+
+
+class ReplayState:
+    """Settled set, frontier and tentative distances at one step of a trace."""
+
+    def __init__(self, trace, step):
+        self.trace = trace
+        self.step = step
+        (self._settle_step, self._reach_step, self._relax_order, self._relax_bounds,
+         self._settle_predecessor) = trace._index
+
+    def _last_relax(self, node_id):
+        # Binary search over this node's relax events, which are in step order
+        start, end = self._relax_bounds[node_id], self._relax_bounds[node_id + 1]
+        k = int(np.searchsorted(self._relax_order[start:end], self.step)) - 1
+        return None if k < 0 else int(self._relax_order[start + k])
+
+    def is_settled(self, node):
+        return self._settle_step[self.trace.node_index[node]] < self.step
+
+    def in_frontier(self, node):
+        node_id = self.trace.node_index[node]
+        return self._reach_step[node_id] < self.step <= self._settle_step[node_id]
+
+    def distance(self, node):
+        event = self._last_relax(self.trace.node_index[node])
+        return float('infinity') if event is None else self.trace.distances[event]
+
+    def predecessor(self, node):
+        event = self._last_relax(self.trace.node_index[node])
+        if event is None or self.trace.predecessors[event] < 0:
+            return None
+        return self.trace.nodes[self.trace.predecessors[event]]
+
+    def settled_nodes(self):
+        nodes = self.trace.nodes
+        return [nodes[i] for i in np.flatnonzero(self._settle_step < self.step).tolist()]
+
+    def frontier_nodes(self):
+        nodes = self.trace.nodes
+        frontier = (self._reach_step < self.step) & (self._settle_step >= self.step)
+        return [nodes[i] for i in np.flatnonzero(frontier).tolist()]
+
+    def tree_edges(self):
+        """(predecessor, node) for every settled node except the source."""
+        nodes = self.trace.nodes
+        node_ids = np.flatnonzero((self._settle_step < self.step) & (self._settle_predecessor >= 0))
+        # In settle order, as the search added them
+        node_ids = node_ids[np.argsort(self._settle_step[node_ids], kind='stable')]
+        return [(nodes[p], nodes[i]) for p, i in zip(self._settle_predecessor[node_ids].tolist(), node_ids.tolist())]
+
+    @property
+    def event(self):
+        """The last applied event as ``(kind, node, predecessor, distance)``, or None at step 0."""
+        if self.step == 0:
+            return None
+        trace, e = self.trace, self.step - 1
+        predecessor = trace.predecessors[e]
+        return (trace.kinds[e], trace.nodes[trace.node_ids[e]],
+                trace.nodes[predecessor] if predecessor >= 0 else None, trace.distances[e])
+
+
+@instrumentation.timed('search')
+def traced_dijkstra(graph, start_node, target=None, stats=None):
+    """``dijkstra()`` that also returns a SearchTrace of every settle and relax.
+
+    Same search, counters and return values otherwise; use plain
+    ``dijkstra()`` when no trace is needed so the hot loop stays free of
+    recording.
+    """
+    nodes = graph.get_nodes()
+    trace = SearchTrace(nodes)
+    node_index = trace.node_index
+    # Bound appends keep recording to a few C calls per event
+    add_kind, add_node = trace.kinds.append, trace.node_ids.append
+    add_predecessor, add_distance = trace.predecessors.append, trace.distances.append
+
+    distances = {node: float('infinity') for node in nodes}
+    distances[start_node] = 0
+    previous_nodes = {node: None for node in nodes}
+    visited = set()
+
+    tie = count()
+    heap = [(0, next(tie), start_node)]
+    trace.record(RELAX, node_index[start_node], -1, 0)
+
+    while heap:
+        current_distance, _, current_node = heapq.heappop(heap)
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        current_id = node_index[current_node]
+        previous = previous_nodes[current_node]
+        add_kind(SETTLE)
+        add_node(current_id)
+        add_predecessor(-1 if previous is None else node_index[previous])
+        add_distance(current_distance)
+
+        if current_node == target:
+            break
+
+        for neighbor, weight in graph.get_weighted_neighbors(current_node):
+            if neighbor in visited:
+                continue
+            tentative_distance = current_distance + weight
+
+            if tentative_distance < distances[neighbor]:
+                distances[neighbor] = tentative_distance
+                previous_nodes[neighbor] = current_node
+                heapq.heappush(heap, (tentative_distance, next(tie), neighbor))
+                add_kind(RELAX)
+                add_node(node_index[neighbor])
+                add_predecessor(current_id)
+                add_distance(tentative_distance)
+
+    trace._index = None
+    pushes = next(tie)
+    instrumentation.report(stats, settled=len(visited), relaxations=pushes - 1, pushes=pushes, pops=pushes - len(heap))
+    return distances, previous_nodes, trace
@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from dijkstra import dijkstra_ids
+from graph_io import load_graph, open_snapshot, save_snapshot
+
+# Graph held by each pool worker, loaded once by _init_worker
+_worker_graph = None
+
+
+def _init_worker(snapshot_path):
+    global _worker_graph
+    # Snapshots are memory-mapped, so workers share the page cache instead of copies
+    _worker_graph = open_snapshot(snapshot_path)
+
+
+def _search(source_id):
+    dist, prev = dijkstra_ids(_worker_graph, source_id)
+    return np.array(dist), np.array(prev, dtype=np.int64)
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+class PathServer:
+    """Serves shortest-path queries over one graph loaded at startup.
+
+    Searches run on a process pool. Concurrent queries from the same source
+    share one in-flight search, and finished shortest-path trees are kept in
+    an LRU cache of at most ``cache_bytes`` bytes of distance and predecessor
+    arrays, so a repeat query is only a path walk over the cached tree.
+
+    Workers always memory-map a snapshot: any other input is parsed once
+    here and saved to a temporary snapshot that is removed by ``close``.
+    """
+
+    def __init__(self, graph_path, workers=None, cache_bytes=256 * 2**20):
+        self.graph_path = graph_path
+        self.graph = load_graph(graph_path)
+        self.snapshot_path = graph_path
+        self.temporary_snapshot = not os.fspath(graph_path).lower().endswith('.djkg')
+        if self.temporary_snapshot:
+            fd, self.snapshot_path = tempfile.mkstemp(suffix='.djkg')
+            os.close(fd)
+            save_snapshot(self.graph, self.snapshot_path)
+        self.executor = ProcessPoolExecutor(workers or os.cpu_count() or 1,
+                                            initializer=_init_worker, initargs=(self.snapshot_path,))
+        self.cache_bytes = cache_bytes
+        self.trees = OrderedDict()
+        self.nbytes = 0
+        self.pending = {}
+        self.started = time.perf_counter()
+        self.latencies = deque(maxlen=100_000)
+        self.counters = {'requests': 0, 'errors': 0, 'searches': 0, 'cache_hits': 0, 'coalesced': 0}
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self.temporary_snapshot and os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+
+    async def tree(self, source_id):
+        tree = self.trees.get(source_id)
+        if tree is not None:
+            self.trees.move_to_end(source_id)
+            self.counters['cache_hits'] += 1
+            return tree
+
+        task = self.pending.get(source_id)
+        if task is None:
+            task = asyncio.ensure_future(self._search(source_id))
+            self.pending[source_id] = task
+            task.add_done_callback(lambda _: self.pending.pop(source_id, None))
+        else:
+            self.counters['coalesced'] += 1
+        # shield: one cancelled client must not cancel the search others wait on
+        return await asyncio.shield(task)
+
+    async def _search(self, source_id):
+        self.counters['searches'] += 1
+        loop = asyncio.get_running_loop()
+        tree = await loop.run_in_executor(self.executor, _search, source_id)
+        dist, prev = tree
+        self.trees[source_id] = tree
+        self.nbytes += dist.nbytes + prev.nbytes
+        # Always keep the newest tree, even if it alone is over budget
+        while self.nbytes > self.cache_bytes and len(self.trees) > 1:
+            _, (dist, prev) = self.trees.popitem(last=False)
+            self.nbytes -= dist.nbytes + prev.nbytes
+        return tree
+
+    async def path(self, source, target):
+        source_id, target_id = self.graph.lookup(source), self.graph.lookup(target)
+        dist, prev = await self.tree(source_id)
+        distance = float(dist[target_id])
+        if distance == float('infinity'):
+            return {'source': source, 'target': target, 'distance': None, 'path': None}
+        ids = [target_id]
+        while ids[-1] != source_id:
+            ids.append(int(prev[ids[-1]]))
+        nodes = self.graph.nodes
+        return {'source': source, 'target': target, 'distance': distance, 'path': [nodes[i] for i in reversed(ids)]}
+
+    async def distance(self, source, target):
+        dist, _ = await self.tree(self.graph.lookup(source))
+        distance = float(dist[self.graph.lookup(target)])
+        return {'source': source, 'target': target, 'distance': None if distance == float('infinity') else distance}
+
+    def stats(self):
+        latencies = list(self.latencies)
+        elapsed = time.perf_counter() - self.started
+        return {
+            **self.counters,
+            'nodes': len(self.graph),
+            'edges': self.graph.num_edges,
+            'cached_trees': len(self.trees),
+            'cached_bytes': self.nbytes,
+            'uptime_s': elapsed,
+            'throughput_rps': self.counters['requests'] / elapsed if elapsed else 0.0,
+            'latency_p50_ms': _percentile(latencies, 50),
+            'latency_p99_ms': _percentile(latencies, 99),
+        }
+
+    async def dispatch(self, method, target):
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if method != 'GET':
+            return 405, {'error': f"method {method} not allowed"}
+        if url.path in ('/path', '/distance'):
+            if 'source' not in params or 'target' not in params:
+                return 400, {'error': "'source' and 'target' are required"}
+            handler = self.path if url.path == '/path' else self.distance
+            try:
+                return 200, await handler(params['source'], params['target'])
+            except KeyError as e:
+                return 404, {'error': f"unknown node {e.args[0]!r}"}
+        if url.path == '/stats':
+            return 200, self.stats()
+        if url.path == '/nodes':
+            try:
+                limit = int(params.get('limit', 100))
+            except ValueError:
+                return 400, {'error': "'limit' must be an integer"}
+            return 200, {'nodes': list(self.graph.nodes[:limit])}
+        return 404, {'error': f"no route {url.path}"}
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: enough for curl and the load generator
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get('content-length', 0)):
+                    await reader.readexactly(int(headers['content-length']))
+
+                start = time.perf_counter()
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                    status, payload = await self.dispatch(method, target)
+                except ValueError:
+                    status, payload = 400, {'error': 'malformed request line'}
+                except Exception as e:
+                    # e.g. BrokenProcessPool or MemoryError: answer the client instead of dropping the connection
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+                self.counters['requests'] += 1
+                if status >= 400:
+                    self.counters['errors'] += 1
+                body = json.dumps(payload).encode('utf-8')
+                self.latencies.append((time.perf_counter() - start) * 1e3)
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n'
+                             % (status, b'OK' if status == 200 else b'Error', len(body), b'keep-alive' if keep_alive else b'close'))
+                writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(graph_path, host='127.0.0.1', port=8765, workers=None, cache_bytes=256 * 2**20):
+    server = PathServer(graph_path, workers=workers, cache_bytes=cache_bytes)
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving {len(server.graph)} nodes / {server.graph.num_edges} edges from {graph_path} on http://{host}:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless JSON shortest-path server.")
+    parser.add_argument('graph', help="graph file: .csv, .gr, .mtx or a .djkg snapshot (other formats are converted to a temporary snapshot once)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-mb', type=float, default=256, help="memory budget for cached shortest-path trees, in MiB")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.graph, args.host, args.port, args.workers, int(args.cache_mb * 2**20)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
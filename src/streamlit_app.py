@@ -1,33 +1,57 @@
 import streamlit as st
 import matplotlib.pyplot as plt
+import numpy as np
 import time
-import networkx as nx
-import random
+from contextlib import nullcontext
+import instrumentation
 from graph import Graph
-from dijkstra import dijkstra
-from visualization import draw_graph
+from dijkstra import astar, euclidean_heuristic, reconstruct_path, shortest_path
+from path_cache import ShortestPathCache
+from graph_io import load_graph
+from layout import Layout
+from search_trace import SETTLE, traced_dijkstra
+from visualization import GraphRenderer, animation_to_gif, draw_graph_lod, LABEL_LIMIT, LOD_NODE_LIMIT
 from matplotlib.animation import FuncAnimation
 
-# Helper function to reconstruct path
-def reconstruct_path(previous_nodes, start, end):
-    path = []
-    current = end
-    while current != start:
-        if current is None:
-            return None
-        path.append(current)
-        current = previous_nodes[current]
-    path.append(start)
-    return path[::-1]
+SEARCH_LABELS = {
+    "Dijkstra": 'dijkstra',
+    "Bidirectional Dijkstra": 'bidirectional',
+    "A* (geometric weights)": 'astar',
+}
+PROFILE_LABELS = ["Off", "cProfile", "Flame graph (folded stacks)"]
+
+
+def frozen_graph():
+    # CSR copy of the graph with the layout's coordinates, rebuilt only when
+    # the graph changes, so level-of-detail frames are pure array work
+    graph = st.session_state.graph
+    cached = st.session_state.get('frozen_graph')
+    if cached is None or cached[0] is not graph or cached[1] != graph.version:
+        frozen = graph.freeze()
+        layout = st.session_state.fixed_layout
+        frozen.coords = np.array([layout[node] for node in frozen.nodes], dtype=float).reshape(-1, 2)
+        cached = (graph, graph.version, frozen)
+        st.session_state.frozen_graph = cached
+    return cached[2]
+
 
 # Initialize session state
 if 'graph' not in st.session_state:
     st.session_state.graph = Graph()
     st.session_state.fixed_layout = {}
     st.session_state.show_graph = False
+if 'layout' not in st.session_state:
+    # fixed_layout is the layout's own positions dict, so both stay in step
+    st.session_state.layout = Layout(st.session_state.graph, st.session_state.fixed_layout)
+    st.session_state.fixed_layout = st.session_state.layout.positions
+if 'path_cache' not in st.session_state:
+    st.session_state.path_cache = ShortestPathCache(st.session_state.graph)
 
 st.set_page_config(layout="wide")
 
+# Counters and phase timings for this script run, shown in the metrics panel
+metrics = instrumentation.QueryStats()
+
 st.title("Dijkstra's Algorithm Visualizer")
 
 # Create two columns for layout
@@ -53,34 +77,91 @@ with left_column:
                 st.session_state.show_graph = True
                 
                 # Update fixed layout if new nodes are added
-                for node in [node1, node2]:
-                    if node not in st.session_state.fixed_layout:
-                        # Find a position not too close to existing nodes
-                        while True:
-                            new_pos = (random.uniform(0, 1), random.uniform(0, 1))
-                            if all(((new_pos[0]-pos[0])**2 + (new_pos[1]-pos[1])**2)**0.5 > 0.2 
-                                   for pos in st.session_state.fixed_layout.values()):
-                                st.session_state.fixed_layout[node] = new_pos
-                                break
+                with instrumentation.collect(metrics):
+                    for node in [node1, node2]:
+                        st.session_state.layout.add_node(node)
             else:
                 st.error("Please enter both nodes and weight.")
 
+        st.header("Load Graph")
+        uploaded_file = st.file_uploader("Edge list (.csv), DIMACS (.gr), Matrix Market (.mtx) or snapshot (.djkg)",
+                                         type=['csv', 'gr', 'mtx', 'djkg'])
+        csv_header = st.radio("CSV header row", ["No", "Yes", "Detect"], horizontal=True,
+                              help="Detect only spots a header whose third (weight) column isn't a number.")
+        if st.button("Load Graph"):
+            if uploaded_file is not None:
+                try:
+                    options = {}
+                    if uploaded_file.name.lower().endswith('.csv'):
+                        options['header'] = {"Detect": None, "Yes": True, "No": False}[csv_header]
+                    loaded = load_graph(uploaded_file, name=uploaded_file.name, **options)
+                except ValueError as e:
+                    st.error(f"Could not load {uploaded_file.name}: {e}")
+                else:
+                    # Labels become strings so they match what the text inputs produce
+                    st.session_state.path_cache.close()
+                    st.session_state.graph = loaded.thaw(label=str)
+                    st.session_state.path_cache = ShortestPathCache(st.session_state.graph)
+                    st.session_state.layout = Layout(st.session_state.graph, st.session_state.graph.get_positions())
+                    st.session_state.fixed_layout = st.session_state.layout.positions
+                    st.session_state.show_graph = True
+                    st.success(f"Loaded {len(loaded)} nodes and {loaded.num_edges} edges from {uploaded_file.name}")
+            else:
+                st.error("Please choose a file to load.")
+
         st.header("Run Dijkstra's Algorithm")
         col1, col2 = st.columns([1,1])
         with col1:
             start_node = st.text_input("Start Node")
         with col2:
             end_node = st.text_input("End Node")
+        search_label = st.selectbox("Search Method", list(SEARCH_LABELS),
+                                    help="A* uses straight-line distance between node positions, so it is only exact when edge weights are geometric distances.")
+        record_trace = st.checkbox("Record search for step-through replay",
+                                   help="Runs plain Dijkstra and logs every step so it can be scrubbed below the graph.")
+        profile_label = st.selectbox("Profile query", PROFILE_LABELS,
+                                     help="Captures a dump of the next query for download from the metrics panel. The query runs slower while profiled.")
         if st.button("Find Shortest Path"):
             if start_node and end_node:
                 if start_node in st.session_state.graph.get_nodes() and end_node in st.session_state.graph.get_nodes():
-                    distances, previous_nodes = dijkstra(st.session_state.graph, start_node)
-                    path = reconstruct_path(previous_nodes, start_node, end_node)
+                    stats = {}
+                    method = SEARCH_LABELS[search_label]
+                    st.session_state.pop('search_trace', None)
+                    st.session_state.pop('profile_dump', None)
+                    if profile_label == "cProfile":
+                        profiler = instrumentation.profiled()
+                    elif profile_label == "Flame graph (folded stacks)":
+                        profiler = instrumentation.StackProfiler()
+                    else:
+                        profiler = nullcontext()
+                    with instrumentation.collect(metrics), profiler as profile:
+                        if record_trace:
+                            distances, previous_nodes, trace = traced_dijkstra(st.session_state.graph, start_node,
+                                                                               target=end_node, stats=stats)
+                            path = reconstruct_path(previous_nodes, start_node, end_node)
+                            distance = distances[end_node]
+                            st.session_state.search_trace = (trace, st.session_state.graph, st.session_state.graph.version)
+                        elif method == 'dijkstra':
+                            # Resumes the start node's cached search, which stops once the end node is settled
+                            path, distance = st.session_state.path_cache.shortest_path(start_node, end_node, stats=stats)
+                        elif method == 'astar':
+                            # Straight-line distances on the drawn layout, not the graph's own positions
+                            heuristic = euclidean_heuristic(st.session_state.fixed_layout, end_node)
+                            path, distance = astar(st.session_state.graph, start_node, end_node,
+                                                   heuristic=heuristic, stats=stats)
+                        else:
+                            path, distance = shortest_path(st.session_state.graph, start_node, end_node,
+                                                           method=method, stats=stats)
+                    if isinstance(profile, instrumentation.StackProfiler):
+                        st.session_state.profile_dump = ('query.folded', profile.text())
+                    elif profile is not None:
+                        st.session_state.profile_dump = ('query.prof', instrumentation.profile_bytes(profile))
                     if path:
                         st.success(f"Shortest path: {' -> '.join(path)}")
-                        st.success(f"Total distance: {distances[end_node]}")
+                        st.success(f"Total distance: {distance}")
+                        st.info(f"Settled nodes: {stats['settled']} of {len(st.session_state.graph.get_nodes())}")
                         st.session_state.shortest_path = path
-                        st.session_state.total_distance = distances[end_node]
+                        st.session_state.total_distance = distance
                     else:
                         st.info(f"No path found between {start_node} and {end_node}")
                         st.session_state.shortest_path = None
@@ -90,6 +171,9 @@ with left_column:
             else:
                 st.error("Please enter both start and end nodes.")
 
+    # Filled in at the end of the run, once rendering has been timed too
+    metrics_section = st.container()
+
 with right_column:
     # Graph section
     graph_section = st.container()
@@ -98,13 +182,36 @@ with right_column:
             st.header("Graph Visualization")
             graph_placeholder = st.empty()
 
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.set_facecolor('#2F3E46')  # Dark background color
+            fig.patch.set_facecolor('#2F3E46')  # Dark background color for the entire figure
+            num_nodes = len(st.session_state.graph.get_nodes())
+            if num_nodes > LOD_NODE_LIMIT:
+                # Large graphs get the level-of-detail drawing and no playback
+                renderer = None
+            else:
+                # Nodes, edges and labels are drawn once; updates only restyle them
+                with instrumentation.collect(metrics):
+                    renderer = GraphRenderer(st.session_state.graph, ax, pos=st.session_state.fixed_layout,
+                                             labels=num_nodes <= LABEL_LIMIT)
+
             def update_graph(highlight_path=None, new_edge=None, total_distance=None):
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.set_facecolor('#2F3E46')  # Dark background color
-                fig.patch.set_facecolor('#2F3E46')  # Dark background color for the entire figure
-                draw_graph(st.session_state.graph, ax, highlight_path=highlight_path, total_distance=total_distance, new_edge=new_edge, pos=st.session_state.fixed_layout)
-                graph_placeholder.pyplot(fig)
-                plt.close(fig)
+                with instrumentation.collect(metrics):
+                    if renderer is None:
+                        ax.clear()
+                        draw_graph_lod(frozen_graph(), ax, highlight_path=highlight_path, total_distance=total_distance,
+                                       new_edge=new_edge)
+                    else:
+                        with instrumentation.phase('render'):
+                            renderer.reset()
+                            if highlight_path:
+                                renderer.highlight_path(highlight_path)
+                            if new_edge:
+                                renderer.highlight_new_edge(new_edge)
+                            renderer.set_total_distance(total_distance)
+                    # st.pyplot rasterizes the figure and encodes it as a PNG
+                    with instrumentation.phase('encode'):
+                        graph_placeholder.pyplot(fig, clear_figure=False)
 
             # Initial graph update
             update_graph()
@@ -123,18 +230,61 @@ with right_column:
 
             # Animate shortest path if found
             if 'shortest_path' in st.session_state:
-                path = st.session_state.shortest_path
-                total_distance = st.session_state.total_distance
-                if path:
-                    for i in range(1, len(path)):
-                        update_graph(highlight_path=path[:i+1], total_distance=total_distance)
-                        time.sleep(0.5)  # Add a small delay for animation effect
-                del st.session_state.shortest_path
-                del st.session_state.total_distance
+                # Taken out of the session first so a failed draw isn't retried on every rerun
+                path = st.session_state.pop('shortest_path')
+                total_distance = st.session_state.pop('total_distance')
+                if path and (renderer is None or len(path) < 2):
+                    # Nothing to play back for a start node that is also the end node
+                    update_graph(highlight_path=path, total_distance=total_distance)
+                elif path:
+                    # Encode the whole playback as one GIF instead of pushing a PNG per step
+                    with instrumentation.collect(metrics):
+                        animation = renderer.animate_path(path, total_distance=total_distance, interval=500)
+                        graph_placeholder.image(animation_to_gif(animation, fps=2))
+
+            # Step through a recorded search; the trace answers any step without re-running it
+            if renderer is not None and 'search_trace' in st.session_state:
+                trace, traced_graph, version = st.session_state.search_trace
+                if traced_graph is st.session_state.graph and version == st.session_state.graph.version:
+                    st.subheader("Search Replay")
+                    step = st.slider("Search step", 0, len(trace), len(trace))
+                    state = trace.state_at(step)
+                    with instrumentation.collect(metrics), instrumentation.phase('render'):
+                        renderer.reset()
+                        renderer.show_search_state(state)
+                    if state.event is not None:
+                        kind, node, predecessor, node_distance = state.event
+                        if kind == SETTLE:
+                            st.caption(f"Settled {node} at distance {node_distance}")
+                        else:
+                            st.caption(f"Relaxed {node} to {node_distance}" + (f" via {predecessor}" if predecessor is not None else ""))
+                    with instrumentation.collect(metrics), instrumentation.phase('encode'):
+                        st.pyplot(fig, clear_figure=False)
+
+            plt.close(fig)
+
+with metrics_section:
+    with st.expander("Performance Metrics"):
+        if metrics:
+            summary = metrics.as_dict()
+            st.caption("Search work and time per phase for the last interaction.")
+            if summary['counters']:
+                st.table({'count': summary['counters']})
+            phases = [name for name in instrumentation.PHASES if name in summary['phases']]
+            st.table({'ms': {name: round(summary['phases'][name]['seconds'] * 1e3, 3) for name in phases},
+                      'calls': {name: summary['phases'][name]['calls'] for name in phases}})
+        else:
+            st.caption("Nothing measured in this run.")
+        if 'profile_dump' in st.session_state:
+            file_name, data = st.session_state.profile_dump
+            st.download_button(f"Download {file_name}", data, file_name=file_name,
+                               help="Open .prof files with pstats or snakeviz, .folded files with flamegraph.pl or speedscope.")
 
 # Add a button to reset the graph to the dummy graph
 if st.button("Dummy Graph"):
+    st.session_state.path_cache.close()
     st.session_state.graph = Graph()
+    st.session_state.path_cache = ShortestPathCache(st.session_state.graph)
     st.session_state.graph.add_edge('A', 'B', 4)
     st.session_state.graph.add_edge('A', 'C', 2)
     st.session_state.graph.add_edge('B', 'D', 3)
@@ -148,12 +298,10 @@ if st.button("Dummy Graph"):
     st.session_state.show_graph = True
     
     # Recreate the fixed layout
-    G = nx.Graph()
+    st.session_state.layout = Layout(st.session_state.graph)
     for node in st.session_state.graph.get_nodes():
-        G.add_node(node)
-    for edge in st.session_state.graph.get_edges():
-        G.add_edge(edge[0], edge[1])
-    st.session_state.fixed_layout = nx.spring_layout(G, k=0.5, iterations=50)
+        st.session_state.layout.add_node(node)
+    st.session_state.fixed_layout = st.session_state.layout.positions
     
     st.rerun() 
     
@@ -1,7 +1,36 @@
+import os
+import tempfile
+
 import networkx as nx
 import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.animation import FuncAnimation, PillowWriter
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+
+import instrumentation
+
+NODE_COLOR = '#87CEFA'
+START_COLOR = '#FFA07A'
+END_COLOR = '#98FB98'
+EDGE_COLOR = 'gray'
+PATH_COLOR = 'r'
+NEW_EDGE_COLOR = 'g'
+SETTLED_COLOR = '#C3B1E1'
+FRONTIER_COLOR = '#FFD700'
+TREE_COLOR = 'orange'
+
+# Level-of-detail thresholds
+LOD_NODE_LIMIT = 200  # draw_graph(lod='auto') switches to draw_graph_lod above this
+LABEL_LIMIT = 50  # labels are dropped when more nodes/edges than this are visible
+DENSITY_EDGE_LIMIT = 20_000  # above this, edges are rasterized into a density image
+
+@instrumentation.timed('render')
+def draw_graph(graph, ax, highlight_path=None, total_distance=None, new_edge=None, pos=None, lod=False):
+    if lod is True or (lod == 'auto' and len(graph.get_nodes()) > LOD_NODE_LIMIT):
+        return draw_graph_lod(graph, ax, highlight_path=highlight_path, total_distance=total_distance,
+                              new_edge=new_edge, pos=pos)
 
-def draw_graph(graph, ax, highlight_path=None, total_distance=None, new_edge=None, pos=None):
     G = nx.Graph()
     for node in graph.get_nodes():
         G.add_node(node)
@@ -41,4 +70,274 @@ def draw_graph(graph, ax, highlight_path=None, total_distance=None, new_edge=Non
 
     ax.axis('off')
 
-    return ax
\ No newline at end of file
+    return ax
+
+def node_size(num_nodes):
+    # 700pt nodes up to LABEL_LIMIT, then shrink so large graphs don't turn into a blob
+    return 700 if num_nodes <= LABEL_LIMIT else max(4, 700 * LABEL_LIMIT / num_nodes)
+
+
+def _node_positions(graph, nodes, pos):
+    if pos is None:
+        if hasattr(graph, 'coords'):
+            return np.asarray(graph.coords, dtype=float)
+        pos = graph.get_positions()
+    return np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+
+
+def _edge_arrays(graph, node_index):
+    # Each undirected edge once, as parallel arrays of node ids and weights
+    if hasattr(graph, 'indptr'):
+        rows = np.repeat(np.arange(len(graph)), np.diff(graph.indptr))
+        cols = np.asarray(graph.indices)
+        keep = rows < cols
+        return rows[keep], cols[keep], np.asarray(graph.weights)[keep]
+    rows, cols, weights = [], [], []
+    for u, v, weight in graph.get_edges():
+        i, j = node_index[u], node_index[v]
+        if i < j:
+            rows.append(i)
+            cols.append(j)
+            weights.append(weight)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int), np.array(weights, dtype=float)
+
+
+def _rasterize_segments(starts, ends, viewport, resolution):
+    # Sample each segment about once per pixel and count hits per pixel
+    xmin, xmax, ymin, ymax = viewport
+    scale = np.array([(resolution - 1) / max(xmax - xmin, 1e-12), (resolution - 1) / max(ymax - ymin, 1e-12)])
+    a = (starts - (xmin, ymin)) * scale
+    b = (ends - (xmin, ymin)) * scale
+    samples = np.clip(np.ceil(np.abs(b - a).max(axis=1)), 1, resolution).astype(np.int64) + 1
+    owner = np.repeat(np.arange(len(a)), samples)
+    t = (np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)) / np.repeat(samples - 1, samples)
+    points = a[owner] + (b[owner] - a[owner]) * t[:, None]
+    px = np.rint(points).astype(np.int64)
+    inside = (px[:, 0] >= 0) & (px[:, 0] < resolution) & (px[:, 1] >= 0) & (px[:, 1] < resolution)
+    px = px[inside]
+    density = np.bincount(px[:, 1] * resolution + px[:, 0], minlength=resolution * resolution)
+    return density.reshape(resolution, resolution)
+
+
+@instrumentation.timed('render')
+def draw_graph_lod(graph, ax, highlight_path=None, total_distance=None, new_edge=None, pos=None,
+                   viewport=None, label_limit=LABEL_LIMIT, density_limit=DENSITY_EDGE_LIMIT, resolution=512):
+    """Level-of-detail version of ``draw_graph`` for large graphs.
+
+    Edges become one LineCollection and nodes one scatter. Only elements
+    that touch ``viewport`` (``(xmin, xmax, ymin, ymax)``, default: all
+    nodes) are drawn. Labels are kept only while at most ``label_limit``
+    nodes are visible. Above ``density_limit`` visible edges, edges are
+    rasterized into a density image and nodes are left out, so drawing
+    cost no longer grows with the graph. Highlights are always drawn.
+    """
+    nodes = graph.get_nodes()
+    node_index = graph.node_index if hasattr(graph, 'node_index') else {node: i for i, node in enumerate(nodes)}
+    xy = _node_positions(graph, nodes, pos)
+    rows, cols, weights = _edge_arrays(graph, node_index)
+
+    if viewport is None:
+        if len(xy):
+            (xmin, ymin), (xmax, ymax) = xy.min(axis=0), xy.max(axis=0)
+            pad = 0.05 * max(xmax - xmin, ymax - ymin, 1e-9)
+            viewport = (xmin - pad, xmax + pad, ymin - pad, ymax + pad)
+        else:
+            viewport = (0, 1, 0, 1)
+    xmin, xmax, ymin, ymax = viewport
+
+    # Cull: keep nodes inside the viewport and edges whose bounding box overlaps it
+    visible_nodes = np.flatnonzero((xy[:, 0] >= xmin) & (xy[:, 0] <= xmax) & (xy[:, 1] >= ymin) & (xy[:, 1] <= ymax))
+    a, b = xy[rows], xy[cols]
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    visible_edges = np.flatnonzero((high[:, 0] >= xmin) & (low[:, 0] <= xmax) & (high[:, 1] >= ymin) & (low[:, 1] <= ymax))
+
+    if len(visible_edges) > density_limit:
+        density = _rasterize_segments(a[visible_edges], b[visible_edges], viewport, resolution)
+        ax.imshow(np.log1p(density), extent=(xmin, xmax, ymin, ymax), origin='lower', cmap='gray',
+                  interpolation='nearest', aspect='auto', zorder=0)
+    else:
+        segments = np.stack([a[visible_edges], b[visible_edges]], axis=1)
+        ax.add_collection(LineCollection(segments, colors=EDGE_COLOR, linewidths=1, zorder=1))
+        ax.scatter(xy[visible_nodes, 0], xy[visible_nodes, 1], s=node_size(len(visible_nodes)), c=NODE_COLOR, zorder=2)
+
+        if len(visible_nodes) <= label_limit:
+            for i in visible_nodes:
+                ax.text(xy[i, 0], xy[i, 1], str(nodes[i]), fontsize=10, fontweight='bold',
+                        ha='center', va='center', zorder=3)
+            if len(visible_edges) <= label_limit:
+                for k in visible_edges:
+                    (x, y) = (a[k] + b[k]) / 2
+                    ax.text(x, y, f"{weights[k]:g}", fontsize=8, ha='center', va='center', zorder=1.5,
+                            bbox=dict(boxstyle='round', ec=(1.0, 1.0, 1.0), fc=(1.0, 1.0, 1.0)))
+
+    def draw_highlight(path, color):
+        ids = [node_index[node] for node in path]
+        segments = np.stack([xy[ids[:-1]], xy[ids[1:]]], axis=1)
+        ax.add_collection(LineCollection(segments, colors=color, linewidths=2, zorder=2.5))
+
+    if highlight_path:
+        draw_highlight(highlight_path, PATH_COLOR)
+        ends = [node_index[highlight_path[0]], node_index[highlight_path[-1]]]
+        ax.scatter(xy[ends, 0], xy[ends, 1], s=max(40, node_size(len(visible_nodes))),
+                   c=[START_COLOR, END_COLOR], zorder=3)
+    if new_edge:
+        draw_highlight(new_edge, NEW_EDGE_COLOR)
+
+    if total_distance is not None:
+        ax.text(0.05, 0.95, f"Total Distance: {total_distance:.2f}", transform=ax.transAxes,
+                fontsize=12, verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8))
+
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+    ax.axis('off')
+
+    return ax
+
+
+class GraphRenderer:
+    """Draws a graph once and restyles it in place.
+
+    Edges are a single LineCollection and nodes a single scatter, so a
+    highlight only rewrites a few entries of their color and width arrays
+    instead of redrawing the figure. Looks the same as ``draw_graph``.
+    """
+
+    @instrumentation.timed('render')
+    def __init__(self, graph, ax, pos=None, labels=True, size=None):
+        self.ax = ax
+        self.nodes = list(graph.get_nodes())
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        if pos is None:
+            G = nx.Graph()
+            G.add_nodes_from(self.nodes)
+            G.add_edges_from((u, v) for u, v, _ in graph.get_edges())
+            pos = nx.spring_layout(G)
+        xy = np.array([pos[node] for node in self.nodes], dtype=float).reshape(-1, 2)
+
+        # Graph.get_edges lists undirected edges in both directions; keep one
+        self.edge_index = {}
+        edges = []
+        for u, v, weight in graph.get_edges():
+            key = frozenset((u, v))
+            if key not in self.edge_index:
+                self.edge_index[key] = len(edges)
+                edges.append((u, v, weight))
+        ends = np.array([(self.node_index[u], self.node_index[v]) for u, v, _ in edges], dtype=int).reshape(-1, 2)
+        segments = np.stack([xy[ends[:, 0]], xy[ends[:, 1]]], axis=1) if len(ends) else np.empty((0, 2, 2))
+
+        self.base_edge_color = np.array(to_rgba(EDGE_COLOR))
+        self.edge_colors = np.tile(self.base_edge_color, (len(edges), 1))
+        self.edge_widths = np.ones(len(edges))
+        self.edge_collection = LineCollection(segments, colors=self.edge_colors, linewidths=self.edge_widths, zorder=1)
+        ax.add_collection(self.edge_collection)
+
+        self.base_node_color = np.array(to_rgba(NODE_COLOR))
+        self.node_colors = np.tile(self.base_node_color, (len(self.nodes), 1))
+        if size is None:
+            size = node_size(len(self.nodes))
+        self.node_collection = ax.scatter(xy[:, 0], xy[:, 1], s=size, c=self.node_colors, zorder=2)
+
+        if labels:
+            for node, (x, y) in zip(self.nodes, xy):
+                ax.text(x, y, str(node), fontsize=10, fontweight='bold', ha='center', va='center', zorder=3)
+            for (u, v, weight), (i, j) in zip(edges, ends):
+                (x, y) = (xy[i] + xy[j]) / 2
+                ax.text(x, y, str(weight), fontsize=8, ha='center', va='center', zorder=1.5,
+                        bbox=dict(boxstyle='round', ec=(1.0, 1.0, 1.0), fc=(1.0, 1.0, 1.0)))
+
+        self.distance_text = ax.text(0.05, 0.95, "", transform=ax.transAxes, fontsize=12, verticalalignment='top',
+                                     bbox=dict(boxstyle='round,pad=0.5', facecolor='white', alpha=0.8))
+        self.distance_text.set_visible(False)
+
+        ax.autoscale_view()
+        ax.margins(0.1)
+        ax.axis('off')
+
+    @property
+    def artists(self):
+        return self.edge_collection, self.node_collection, self.distance_text
+
+    def _style_edge(self, u, v, color, width):
+        k = self.edge_index.get(frozenset((u, v)))
+        if k is not None:
+            self.edge_colors[k] = to_rgba(color)
+            self.edge_widths[k] = width
+
+    def _push_styles(self):
+        self.edge_collection.set_color(self.edge_colors)
+        self.edge_collection.set_linewidths(self.edge_widths)
+        self.node_collection.set_facecolor(self.node_colors)
+
+    def reset(self):
+        self.edge_colors[:] = self.base_edge_color
+        self.edge_widths[:] = 1
+        self.node_colors[:] = self.base_node_color
+        self.distance_text.set_visible(False)
+        self._push_styles()
+
+    def set_total_distance(self, total_distance):
+        if total_distance is None:
+            self.distance_text.set_visible(False)
+        else:
+            self.distance_text.set_text(f"Total Distance: {total_distance:.2f}")
+            self.distance_text.set_visible(True)
+
+    def highlight_path(self, path):
+        self.node_colors[self.node_index[path[0]]] = to_rgba(START_COLOR)
+        self.node_colors[self.node_index[path[-1]]] = to_rgba(END_COLOR)
+        for u, v in zip(path[:-1], path[1:]):
+            self._style_edge(u, v, PATH_COLOR, 2)
+        self._push_styles()
+
+    def highlight_new_edge(self, edge):
+        self._style_edge(edge[0], edge[1], NEW_EDGE_COLOR, 2)
+        self._push_styles()
+
+    def show_search_state(self, state):
+        """Color a ``search_trace.ReplayState``: settled nodes, frontier and tree edges."""
+        for node in state.settled_nodes():
+            self.node_colors[self.node_index[node]] = to_rgba(SETTLED_COLOR)
+        for node in state.frontier_nodes():
+            self.node_colors[self.node_index[node]] = to_rgba(FRONTIER_COLOR)
+        for u, v in state.tree_edges():
+            self._style_edge(u, v, TREE_COLOR, 2)
+        self._push_styles()
+
+    def step_path(self, path, i):
+        # Extend the highlighted prefix from path[:i] to path[:i + 1]
+        if i > 1:
+            self.node_colors[self.node_index[path[i - 1]]] = self.base_node_color
+        self.node_colors[self.node_index[path[0]]] = to_rgba(START_COLOR)
+        self.node_colors[self.node_index[path[i]]] = to_rgba(END_COLOR)
+        self._style_edge(path[i - 1], path[i], PATH_COLOR, 2)
+        self._push_styles()
+
+    def animate_path(self, path, total_distance=None, interval=500):
+        """One frame per path edge, as the old per-frame redraw loop showed them."""
+        def init():
+            self.reset()
+            self.set_total_distance(total_distance)
+            return self.artists
+
+        def update(i):
+            if i == 1:
+                init()
+            self.step_path(path, i)
+            return self.artists
+
+        return FuncAnimation(self.ax.figure, update, frames=range(1, len(path)), init_func=init,
+                             interval=interval, blit=True, repeat=False)
+
+
+@instrumentation.timed('encode')
+def animation_to_gif(animation, fps=2):
+    """Encode a FuncAnimation into GIF bytes in one pass."""
+    fd, path = tempfile.mkstemp(suffix='.gif')
+    os.close(fd)
+    try:
+        animation.save(path, writer=PillowWriter(fps=fps))
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from contraction_hierarchy import ContractionHierarchy
+from dijkstra import dijkstra
+from graph import Graph
+
+
+def random_graph(rng, num_nodes=80, num_edges=160):
+    graph = Graph()
+    for node in range(num_nodes):
+        graph.add_node(node)
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_nodes), 2)
+        graph.add_edge(u, v, rng.randint(1, 20))
+    return graph
+
+
+def check_queries(graph, hierarchy, rng, queries=200):
+    nodes = graph.get_nodes()
+    for _ in range(queries):
+        source, target = rng.choice(nodes), rng.choice(nodes)
+        distances, _ = dijkstra(graph, source)
+        path, distance = hierarchy.shortest_path(source, target)
+        assert distance == pytest.approx(distances[target])
+        if path is None:
+            assert distances[target] == float('infinity')
+        else:
+            assert path[0] == source and path[-1] == target
+            assert sum(graph.get_edge_weight(u, v) for u, v in zip(path, path[1:])) == pytest.approx(distance)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_dijkstra(seed):
+    rng = random.Random(seed)
+    graph = random_graph(rng)
+    check_queries(graph, ContractionHierarchy.build(graph), rng)
+
+
+def test_save_load_round_trip(tmp_path):
+    rng = random.Random(42)
+    graph = random_graph(rng)
+    path = tmp_path / 'index.npz'
+    ContractionHierarchy.build(graph).save(path)
+    check_queries(graph, ContractionHierarchy.load(path), rng)
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from dijkstra import dijkstra
+from graph import Graph
+from path_cache import ShortestPathCache
+
+
+def random_graph(rng, num_nodes=60, num_edges=120):
+    graph = Graph()
+    for node in range(num_nodes):
+        graph.add_node(node)
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_nodes), 2)
+        graph.add_edge(u, v, rng.randint(1, 20))
+    return graph
+
+
+def reachable(distances):
+    return {node: distance for node, distance in distances.items() if distance != float('infinity')}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_dijkstra_after_edits(seed):
+    rng = random.Random(seed)
+    graph = random_graph(rng)
+    cache = ShortestPathCache(graph, max_bytes=20_000)
+    nodes = graph.get_nodes()
+    sources = nodes[:8]
+
+    for _ in range(300):
+        edit = rng.random()
+        if edit < 0.1:
+            # New edge, possibly to a node the graph hasn't seen
+            graph.add_edge(rng.choice(nodes), rng.randrange(len(nodes) + 5), rng.randint(1, 20))
+            nodes = graph.get_nodes()
+        elif edit < 0.3:
+            u, v, weight = rng.choice(sorted(graph.get_edges()))
+            graph.add_edge(u, v, weight * rng.choice([0.5, 2]))
+
+        source, target = rng.choice(sources), rng.choice(nodes)
+        distances, _ = dijkstra(graph, source)
+        path, distance = cache.shortest_path(source, target)
+        assert distance == pytest.approx(distances[target])
+        if path is not None:
+            assert path[0] == source and path[-1] == target
+            assert sum(graph.get_edge_weight(u, v) for u, v in zip(path, path[1:])) == pytest.approx(distance)
+
+        if rng.random() < 0.1:
+            tree, _ = cache.tree(source)
+            assert tree == pytest.approx(reachable(distances))
+    cache.close()
+
+
+def test_edge_between_unreached_nodes_leaves_tree_alone():
+    graph = Graph()
+    graph.add_edge('A', 'B', 1)
+    cache = ShortestPathCache(graph)
+    cache.tree('A')
+    graph.add_edge('X', 'Y', 2)
+    assert cache.tree('A')[0] == {'A': 0, 'B': 1}
+    graph.add_edge('B', 'X', 1)
+    assert cache.tree('A')[0] == {'A': 0, 'B': 1, 'X': 2, 'Y': 4}